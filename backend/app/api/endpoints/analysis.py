@@ -28,7 +28,7 @@ from app.models.schemas import (
 )
 from app.db import get_db, SavedReport, Lead
 from app.db import repositories
-from app.db.supabase_client import log_lead_to_supabase, log_analysis_to_supabase
+from app.db.supabase_client import log_lead_to_supabase, log_analysis_to_supabase_nowait
 from app.core.logging_config import (
     get_logger, 
     log_analysis_start, 
@@ -612,7 +612,7 @@ async def analyze_timesheet(file: UploadFile = File(...), db: Session = Depends(
                 
                 # Log parsing failure to Supabase (task 5.2.2)
                 total_duration = time.time() - analysis_start_time
-                supabase_result = await log_analysis_to_supabase(
+                log_analysis_to_supabase_nowait(
                     request_id=request_id,
                     original_filename=filename,
                     status="error_parsing_failed",
@@ -640,7 +640,7 @@ async def analyze_timesheet(file: UploadFile = File(...), db: Session = Depends(
             
             # Log parsing failure to Supabase (task 5.2.2)
             total_duration = time.time() - analysis_start_time
-            supabase_result = await log_analysis_to_supabase(
+            log_analysis_to_supabase_nowait(
                 request_id=request_id,
                 original_filename=filename,
                 status="error_parsing_failed",
@@ -661,7 +661,7 @@ async def analyze_timesheet(file: UploadFile = File(...), db: Session = Depends(
             
             # Log parsing failure to Supabase (task 5.2.2)
             total_duration = time.time() - analysis_start_time
-            supabase_result = await log_analysis_to_supabase(
+            log_analysis_to_supabase_nowait(
                 request_id=request_id,
                 original_filename=filename,
                 status="error_parsing_failed",
@@ -798,7 +798,7 @@ async def analyze_timesheet(file: UploadFile = File(...), db: Session = Depends(
                 
                 # Log analysis metadata to Supabase (task 5.2.2)
                 total_duration = time.time() - analysis_start_time
-                supabase_result = await log_analysis_to_supabase(
+                queued = log_analysis_to_supabase_nowait(
                     request_id=request_id,
                     original_filename=filename,
                     status=status,
@@ -811,10 +811,11 @@ async def analyze_timesheet(file: UploadFile = File(...), db: Session = Depends(
                     processing_time_seconds=total_duration
                 )
                 
-                if supabase_result["success"]:
-                    request_logger.info(f"Analysis metadata logged to Supabase successfully")
+                # The write happens in the background; failed batches are logged by the writer
+                if queued:
+                    request_logger.info(f"Analysis metadata queued for Supabase logging")
                 else:
-                    request_logger.warning(f"Failed to log analysis metadata to Supabase: {supabase_result.get('error', 'Unknown error')}")
+                    request_logger.warning(f"Analysis log queue unavailable, metadata written to Supabase directly")
                 
             except Exception as save_error:
                 request_logger.warning(f"Failed to save report to database: {save_error}")
@@ -846,7 +847,7 @@ async def analyze_timesheet(file: UploadFile = File(...), db: Session = Depends(
             
             # Log compliance analysis failure to Supabase (task 5.2.2)
             total_duration = time.time() - analysis_start_time
-            supabase_result = await log_analysis_to_supabase(
+            log_analysis_to_supabase_nowait(
                 request_id=request_id,
                 original_filename=filename,
                 status="error_analysis_failed",
@@ -1217,7 +1218,7 @@ async def analyze_timesheet_advanced(
                 
                 # Log parsing failure to Supabase
                 total_duration = time.time() - analysis_start_time
-                supabase_result = await log_analysis_to_supabase(
+                log_analysis_to_supabase_nowait(
                     request_id=request_id,
                     original_filename=filename,
                     status="error_parsing_failed",
@@ -1243,7 +1244,7 @@ async def analyze_timesheet_advanced(
             )
             
             total_duration = time.time() - analysis_start_time
-            supabase_result = await log_analysis_to_supabase(
+            log_analysis_to_supabase_nowait(
                 request_id=request_id,
                 original_filename=filename,
                 status="error_parsing_failed",
@@ -1263,7 +1264,7 @@ async def analyze_timesheet_advanced(
             request_logger.error(f"Advanced LLM parsing failed: {str(e)}")
             
             total_duration = time.time() - analysis_start_time
-            supabase_result = await log_analysis_to_supabase(
+            log_analysis_to_supabase_nowait(
                 request_id=request_id,
                 original_filename=filename,
                 status="error_parsing_failed",
@@ -165,25 +165,30 @@ def _detect_logical_shifts(sorted_events: List[LLMParsedPunchEvent]) -> List[Lis
     shifts = []
     current_shift = [sorted_events[0]]
     
+    # Each event is looked at as both the end and the start of a pair, so read its
+    # timestamp and classify its punch type once up front
+    timestamps = [event.timestamp for event in sorted_events]
+    is_clock_out = [_is_clock_out_event(event) for event in sorted_events]
+    is_clock_in = [_is_clock_in_event(event) for event in sorted_events]
+    
     for i in range(1, len(sorted_events)):
-        prev_event = sorted_events[i-1]
         curr_event = sorted_events[i]
         
         # Calculate time gap between events
-        time_gap_hours = (curr_event.timestamp - prev_event.timestamp).total_seconds() / 3600
+        time_gap_hours = (timestamps[i] - timestamps[i-1]).total_seconds() / 3600
         
         # Determine if this starts a new shift
         should_start_new_shift = False
         
         # PRIMARY RULE: Only split on Clock Out → Clock In patterns (actual breaks)
-        if (_is_clock_out_event(prev_event) and _is_clock_in_event(curr_event)):
+        if is_clock_out[i-1] and is_clock_in[i]:
             
             # Rule 1: Long break (4+ hours) = new shift
             if time_gap_hours >= 4:
                 should_start_new_shift = True
             
             # Rule 2: Break crosses 4 AM dead zone = new shift
-            elif _crosses_4am_dead_zone(prev_event.timestamp, curr_event.timestamp):
+            elif _crosses_4am_dead_zone(timestamps[i-1], timestamps[i]):
                 should_start_new_shift = True
             
             # Rule 3: Otherwise, Clock Out → Clock In with < 4 hours and no dead zone crossing
@@ -247,15 +252,17 @@ def _crosses_4am_dead_zone(clock_out_time: datetime, clock_in_time: datetime) ->
     
     return False
 
+# Substring keywords for clock in/out punch types, each matched in one regex scan
+_CLOCK_IN_RE = re.compile('|'.join(map(re.escape, ['in', 'clock in', 'start'])))
+_CLOCK_OUT_RE = re.compile('|'.join(map(re.escape, ['out', 'clock out', 'end'])))
+
 def _is_clock_in_event(event: LLMParsedPunchEvent) -> bool:
     """Check if an event represents clocking in"""
-    punch_type = event.punch_type_as_parsed.lower()
-    return any(keyword in punch_type for keyword in ['in', 'clock in', 'start'])
+    return _CLOCK_IN_RE.search(event.punch_type_as_parsed.lower()) is not None
 
 def _is_clock_out_event(event: LLMParsedPunchEvent) -> bool:
     """Check if an event represents clocking out"""
-    punch_type = event.punch_type_as_parsed.lower()
-    return any(keyword in punch_type for keyword in ['out', 'clock out', 'end'])
+    return _CLOCK_OUT_RE.search(event.punch_type_as_parsed.lower()) is not None
 
 def detect_meal_break_violations(punch_events: List[LLMParsedPunchEvent]) -> List[ViolationInstance]:
     """
@@ -573,7 +580,10 @@ def _check_missing_rest_breaks(shift: WorkShift, expected_breaks: int) -> Option
     
     return None
 
-def detect_daily_overtime_violations(punch_events: List[LLMParsedPunchEvent]) -> List[ViolationInstance]:
+def detect_daily_overtime_violations(
+    punch_events: List[LLMParsedPunchEvent],
+    shifts_by_employee: Optional[Dict[str, List[WorkShift]]] = None
+) -> List[ViolationInstance]:
     """
     Detect daily overtime violations based on California Labor Law:
     
@@ -583,14 +593,16 @@ def detect_daily_overtime_violations(punch_events: List[LLMParsedPunchEvent]) ->
     
     Args:
         punch_events: List of parsed punch events from LLM processing
+        shifts_by_employee: Shifts already parsed from punch_events, to skip re-parsing them
         
     Returns:
         List of ViolationInstance objects representing daily overtime violations
     """
     violations = []
     
-    # Parse punch events into shifts
-    shifts_by_employee = parse_shifts_from_punch_events(punch_events)
+    # Parse punch events into shifts unless the caller already did
+    if shifts_by_employee is None:
+        shifts_by_employee = parse_shifts_from_punch_events(punch_events)
     
     for employee_id, shifts in shifts_by_employee.items():
         for shift in shifts:
@@ -684,7 +696,10 @@ def _check_shift_daily_overtime(shift: WorkShift) -> List[ViolationInstance]:
     
     return violations
 
-def detect_weekly_overtime_violations(punch_events: List[LLMParsedPunchEvent]) -> List[ViolationInstance]:
+def detect_weekly_overtime_violations(
+    punch_events: List[LLMParsedPunchEvent],
+    shifts_by_employee: Optional[Dict[str, List[WorkShift]]] = None
+) -> List[ViolationInstance]:
     """
     Detect weekly overtime violations based on California Labor Law:
     
@@ -695,14 +710,16 @@ def detect_weekly_overtime_violations(punch_events: List[LLMParsedPunchEvent]) -
     
     Args:
         punch_events: List of parsed punch events from LLM processing
+        shifts_by_employee: Shifts already parsed from punch_events, to skip re-parsing them
         
     Returns:
         List of ViolationInstance objects representing weekly overtime violations
     """
     violations = []
     
-    # Parse punch events into shifts
-    shifts_by_employee = parse_shifts_from_punch_events(punch_events)
+    # Parse punch events into shifts unless the caller already did
+    if shifts_by_employee is None:
+        shifts_by_employee = parse_shifts_from_punch_events(punch_events)
     
     for employee_id, shifts in shifts_by_employee.items():
         # Group shifts by workweek (Sunday-Saturday)
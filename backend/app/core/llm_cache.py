@@ -0,0 +1,125 @@
+"""
+On-disk cache for LLM timesheet parsing results
+
+Debug scripts and local experiments tend to parse the same file over and
+over, paying a full LLM round-trip each time. cached_parse wraps
+parse_file_to_structured_data with an exact-match cache keyed by SHA-256 of
+the file bytes, MIME type, filename and the parsing module's source, so a
+repeated parse of unchanged input is a pickle load instead of an API call.
+
+Cache entries live in ~/.timesheet_magic_cache (override with
+TIMESHEET_MAGIC_CACHE_DIR). Editing llm_processing.py (e.g. its prompts)
+changes the key, so stale results are never served after a prompt change.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+from app.core import llm_processing
+from app.core.logging_config import get_logger
+from app.models.schemas import LLMProcessingOutput
+
+logger = get_logger("llm_cache")
+
+CACHE_DIR = Path(
+    os.getenv("TIMESHEET_MAGIC_CACHE_DIR", Path.home() / ".timesheet_magic_cache")
+)
+
+
+@lru_cache(maxsize=1)
+def _prompt_version() -> str:
+    """Fingerprint of the parsing module's source, which contains the prompts."""
+    with open(llm_processing.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def cache_key(file_bytes: bytes, mime_type: str, original_filename: str) -> str:
+    """Build the cache key for one parse request."""
+    digest = hashlib.sha256(file_bytes)
+    for part in (mime_type, original_filename, _prompt_version()):
+        digest.update(b"\0")
+        digest.update(part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _read_entry(path: Path) -> Union[LLMProcessingOutput, None]:
+    """Load a cached result, treating unreadable entries as misses."""
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable LLM cache entry {path.name}: {e}")
+        return None
+
+
+def _write_entry(path: Path, result: LLMProcessingOutput) -> None:
+    """Write a result atomically so readers never see a partial pickle."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+async def cached_parse(
+    file_bytes: Union[bytes, str],
+    mime_type: str,
+    original_filename: str
+) -> LLMProcessingOutput:
+    """
+    Parse a file with the LLM, reusing a cached result for identical input.
+
+    Concurrent callers for the same key are serialized with an exclusive
+    file lock, so only the first one calls the LLM. Results without any
+    punch events are not cached, so a failed parse is retried next time.
+
+    Args:
+        file_bytes: Raw file content (str is encoded as UTF-8)
+        mime_type: MIME type of the file
+        original_filename: Original filename for context
+
+    Returns:
+        LLMProcessingOutput from the cache or a fresh parse
+    """
+    if isinstance(file_bytes, str):
+        file_bytes = file_bytes.encode("utf-8")
+
+    key = cache_key(file_bytes, mime_type, original_filename)
+    entry_path = CACHE_DIR / f"{key}.pkl"
+
+    result = _read_entry(entry_path)
+    if result is not None:
+        logger.info(f"LLM cache hit for {original_filename} ({key[:12]})")
+        return result
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(CACHE_DIR / f"{key}.lock", "wb") as lock_file:
+        # Wait for the lock off the event loop; another process may be parsing this file
+        await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            result = _read_entry(entry_path)
+            if result is not None:
+                logger.info(f"LLM cache hit for {original_filename} ({key[:12]})")
+                return result
+
+            logger.info(f"LLM cache miss for {original_filename} ({key[:12]})")
+            result = await llm_processing.parse_file_to_structured_data(
+                file_bytes, mime_type, original_filename
+            )
+            if result.punch_events:
+                _write_entry(entry_path, result)
+            return result
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
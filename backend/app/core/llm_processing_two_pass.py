@@ -304,25 +304,13 @@ async def parse_employee_punches(
     logger.debug(f"Starting individual parsing for employee '{employee_identifier}' in '{original_filename}'")
     
     try:
-        # Create the per-employee parsing prompt
+        # Create the per-employee parsing prompt. The generic instructions and the file
+        # content are identical for every employee of a file, so they come first and the
+        # parallel per-employee calls share one long prefix that Gemini's implicit prompt
+        # cache can reuse. The rules naming the target employee follow the file.
         parsing_prompt = f"""
 You are an expert timesheet analyst parsing punch events for ONE specific employee. Your goal is to find EVERY single time recording event for this employee with 100% accuracy.
 
-TARGET EMPLOYEE: "{employee_identifier}"
-
-🎯 CRITICAL SUCCESS CRITERIA:
-1. ONLY return punch events for the EXACT employee identifier: "{employee_identifier}"
-2. Find EVERY timestamp entry for this employee - missing events causes compliance violations
-3. The employee_identifier_in_file field must EXACTLY match: "{employee_identifier}"
-4. Ignore all other employees completely
-
-🔍 SYSTEMATIC SCANNING INSTRUCTIONS:
-1. First, scan the ENTIRE file for any mention of: "{employee_identifier}"
-2. For each mention, look for associated timestamp data (times, dates)
-3. Every time entry = one punch event (Clock In, Clock Out, Break Start, Break End, etc.)
-4. Look in ALL sections: headers, data rows, totals, notes, anywhere timestamps appear
-5. Check for multiple date ranges - employees may work across several days/weeks
-
 📋 PUNCH EVENT TYPES TO EXTRACT (each timestamp = 1 event):
 ✅ Clock In / Clock Out (start/end of shift)
 ✅ Break Start / Break End (any break or rest period)  
@@ -350,15 +338,30 @@ TARGET EMPLOYEE: "{employee_identifier}"
 - For AM times, keep as-is (e.g., 10:11 AM = 10:11, 5:04 AM = 05:04)
 - For dates: use YYYY-MM-DD format consistently
 
-💡 ACCURACY CHECK:
-Expected punch count for this employee: {estimated_punch_count if estimated_punch_count else "Unknown"}
-Double-check your work - scan the file twice if needed to ensure no timestamps are missed.
-
 📄 FILE CONTENT TO ANALYZE:
 ```
 {file_content}
 ```
 
+TARGET EMPLOYEE: "{employee_identifier}"
+
+🎯 CRITICAL SUCCESS CRITERIA:
+1. ONLY return punch events for the EXACT employee identifier: "{employee_identifier}"
+2. Find EVERY timestamp entry for this employee - missing events causes compliance violations
+3. The employee_identifier_in_file field must EXACTLY match: "{employee_identifier}"
+4. Ignore all other employees completely
+
+🔍 SYSTEMATIC SCANNING INSTRUCTIONS:
+1. First, scan the ENTIRE file for any mention of: "{employee_identifier}"
+2. For each mention, look for associated timestamp data (times, dates)
+3. Every time entry = one punch event (Clock In, Clock Out, Break Start, Break End, etc.)
+4. Look in ALL sections: headers, data rows, totals, notes, anywhere timestamps appear
+5. Check for multiple date ranges - employees may work across several days/weeks
+
+💡 ACCURACY CHECK:
+Expected punch count for this employee: {estimated_punch_count if estimated_punch_count else "Unknown"}
+Double-check your work - scan the file twice if needed to ensure no timestamps are missed.
+
 🎯 FINAL INSTRUCTION: Extract ALL punch events for employee "{employee_identifier}". 
 Be thorough and systematic - compliance depends on finding every single timestamp entry.
 Use the parse_employee_punches function to return your structured findings."""
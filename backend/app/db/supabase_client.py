@@ -8,14 +8,24 @@ It provides functions to:
 - Manage database connections and error handling
 
 The module supports both Supabase and local database operations for flexibility.
+When SUPABASE_DB_URL is set, inserts go straight to Postgres through a shared
+asyncpg connection pool instead of the Supabase REST API.
 """
 
+import asyncio
 import os
+import random
+import re
 import uuid
+import weakref
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional, List, Union
-from supabase import create_client, Client
-from pydantic import BaseModel, EmailStr
+from typing import Awaitable, Callable, Dict, Any, Optional, List, Sequence, Set, Tuple, TypeVar, Union
+import asyncpg
+import httpx
+import msgspec
+from postgrest.exceptions import APIError
+from supabase import create_client, Client, ClientOptions
+from pydantic import BaseModel, field_validator
 
 from app.core.logging_config import get_logger, log_database_operation
 
@@ -30,10 +40,15 @@ class SupabaseConfig:
         self.supabase_key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_ANON_KEY")
         self.enabled = bool(self.supabase_url and self.supabase_key)
         
+        # Direct Postgres connection string for the asyncpg pool (optional)
+        self.database_url = os.getenv("SUPABASE_DB_URL")
+        self.pool_enabled = bool(self.database_url)
+        
         # Debug logging to see what we're getting
         logger.info(f"Supabase URL: {'SET' if self.supabase_url else 'MISSING'}")
         logger.info(f"Supabase Key: {'SET' if self.supabase_key else 'MISSING'}")
         logger.info(f"Supabase enabled: {self.enabled}")
+        logger.info(f"Supabase Postgres pool enabled: {self.pool_enabled}")
         
         if not self.enabled:
             logger.warning(
@@ -41,14 +56,26 @@ class SupabaseConfig:
                 "environment variables to enable Supabase integration."
             )
 
+# Compiled once; a syntactic check is enough for lead capture and avoids
+# email-validator's per-instance parsing and deliverability lookups
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
 class LeadData(BaseModel):
     """Data model for lead information."""
     manager_name: str
-    email: EmailStr
+    email: str
     phone: Optional[str] = None
     store_name: str
     store_address: str
     analysis_id: Optional[str] = None
+    
+    @field_validator("email")
+    @classmethod
+    def validate_email(cls, value: str) -> str:
+        """Reject values that are not shaped like an email address."""
+        if not _EMAIL_RE.match(value):
+            raise ValueError("value is not a valid email address")
+        return value
 
 class AnalysisMetadata(BaseModel):
     """Data model for analysis metadata."""
@@ -64,6 +91,167 @@ class AnalysisMetadata(BaseModel):
     processing_time_seconds: Optional[float] = None
     error_message: Optional[str] = None
 
+# Maximum number of rows sent in a single Supabase insert request
+BULK_INSERT_CHUNK_SIZE = 500
+
+# Batches larger than this use the binary COPY protocol on the asyncpg pool
+COPY_THRESHOLD = 1000
+
+# Reused encoder for REST bulk insert payloads; much faster than json.dumps
+_json_encoder = msgspec.json.Encoder()
+
+# Connection limits for the keep-alive HTTP/2 clients used to reach PostgREST
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+_HTTP_TIMEOUT = 30
+
+# Column order used for direct Postgres inserts
+LEAD_COLUMNS = (
+    "id", "analysis_id", "manager_name", "email", "phone",
+    "store_name", "store_address", "created_at"
+)
+ANALYSIS_METADATA_COLUMNS = (
+    "request_id", "original_filename", "status", "file_size", "file_type",
+    "employee_count", "total_violations", "total_hours", "overtime_cost",
+    "processing_time_seconds", "error_message", "created_at"
+)
+
+def _build_insert_sql(
+    table: str,
+    columns: Sequence[str],
+    conflict_column: Optional[str] = None
+) -> str:
+    """
+    Build a parameterised INSERT statement for asyncpg.
+    
+    With conflict_column the statement becomes an upsert that overwrites
+    the existing row, so retried writes stay idempotent.
+    """
+    placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    if conflict_column:
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}" for column in columns if column != conflict_column
+        )
+        sql += f" ON CONFLICT ({conflict_column}) DO UPDATE SET {updates}"
+    return sql
+
+INSERT_LEAD_SQL = _build_insert_sql("leads", LEAD_COLUMNS)
+# Relies on the UNIQUE constraint on analysis_metadata.request_id
+UPSERT_ANALYSIS_SQL = _build_insert_sql(
+    "analysis_metadata", ANALYSIS_METADATA_COLUMNS, conflict_column="request_id"
+)
+
+# asyncpg pools are bound to the event loop that created them, so keep one
+# pool (and the lock guarding its creation) per running loop
+_pg_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncpg.Pool]" = weakref.WeakKeyDictionary()
+_pg_pool_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+# asyncpg prepares each statement once per connection and keeps it in this
+# connection-level cache, so repeated INSERTs skip the parse/plan round-trip
+STATEMENT_CACHE_SIZE = 100
+
+async def get_pg_pool(dsn: str) -> asyncpg.Pool:
+    """
+    Get the asyncpg connection pool for the running event loop, creating it on first use.
+    
+    Args:
+        dsn: Postgres connection string
+        
+    Returns:
+        asyncpg.Pool shared by all SupabaseClient instances on this loop
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pg_pools.get(loop)
+    if pool is None:
+        lock = _pg_pool_locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            pool = _pg_pools.get(loop)
+            if pool is None:
+                pool = await asyncpg.create_pool(
+                    dsn,
+                    min_size=10,
+                    max_size=50,
+                    max_inactive_connection_lifetime=300,
+                    max_queries=50_000,
+                    command_timeout=60,
+                    statement_cache_size=STATEMENT_CACHE_SIZE
+                )
+                _pg_pools[loop] = pool
+                logger.info("Supabase Postgres connection pool created")
+    return pool
+
+async def close_pg_pool() -> None:
+    """Close the running event loop's asyncpg pool if it was created."""
+    pool = _pg_pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+        logger.info("Supabase Postgres connection pool closed")
+
+T = TypeVar("T")
+
+def _is_recoverable_error(error: Exception) -> bool:
+    """
+    Classify whether a Supabase failure is transient and worth retrying.
+    
+    5xx responses (including Cloudflare 522/524), timeouts and dropped
+    connections are recoverable; validation errors and 4xx responses are not.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    if isinstance(error, APIError):
+        # PostgREST reports non-JSON gateway failures with the HTTP status as code
+        code = str(error.code or "")
+        return len(code) == 3 and code.startswith("5")
+    return isinstance(error, (
+        asyncio.TimeoutError,
+        ConnectionError,
+        httpx.TransportError,
+        asyncpg.exceptions.PostgresConnectionError,
+        asyncpg.exceptions.ConnectionDoesNotExistError,
+    ))
+
+async def _with_retry(
+    coro_factory: Callable[[], Awaitable[T]],
+    max_retries: int = 3,
+    base: float = 1.0,
+    jitter: float = 0.5,
+    max_delay: float = 30.0
+) -> T:
+    """
+    Run a Supabase operation, retrying transient failures with exponential backoff.
+    
+    Args:
+        coro_factory: Callable returning a fresh awaitable for each attempt
+        max_retries: Maximum number of retries after the first attempt
+        base: Base delay in seconds, doubled on every retry
+        jitter: Maximum random seconds added to each delay
+        max_delay: Upper bound for the exponential part of the delay
+        
+    Returns:
+        Result of the first successful attempt
+    """
+    attempt = 0
+    while True:
+        try:
+            return await coro_factory()
+        except Exception as e:
+            if attempt >= max_retries or not _is_recoverable_error(e):
+                raise
+            delay = min(max_delay, base * (2 ** attempt)) + random.uniform(0, jitter)
+            attempt += 1
+            logger.warning(
+                f"Transient Supabase error, retrying in {delay:.2f}s "
+                f"(attempt {attempt}/{max_retries}): {e}"
+            )
+            await asyncio.sleep(delay)
+
+def _record_to_args(record: Dict[str, Any], columns: Sequence[str]) -> Tuple[Any, ...]:
+    """Convert an insert record into positional asyncpg arguments."""
+    return tuple(
+        datetime.fromisoformat(record[column]) if column == "created_at" else record[column]
+        for column in columns
+    )
+
 class SupabaseClient:
     """
     Client class for interacting with Supabase database.
@@ -75,12 +263,27 @@ class SupabaseClient:
     def __init__(self):
         self.config = SupabaseConfig()
         self.client: Optional[Client] = None
+        # Strong references to fire-and-forget logging tasks until they finish
+        self._bg_tasks: Set[asyncio.Task] = set()
+        # Keep-alive HTTP/2 clients shared by every PostgREST request:
+        # _http for direct bulk inserts, _sync_http for the supabase-py client
+        self._http: Optional[httpx.AsyncClient] = None
+        self._sync_http: Optional[httpx.Client] = None
+        # Batch writer for queued analysis metadata, started on first use
+        self._analysis_logger: Optional["AsyncAnalysisLogger"] = None
         
         if self.config.enabled:
             try:
+                self._http = httpx.AsyncClient(
+                    http2=True, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT
+                )
+                self._sync_http = httpx.Client(
+                    http2=True, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT
+                )
                 self.client = create_client(
                     self.config.supabase_url,
-                    self.config.supabase_key
+                    self.config.supabase_key,
+                    options=ClientOptions(httpx_client=self._sync_http)
                 )
                 logger.info("Supabase client initialized successfully")
             except Exception as e:
@@ -91,7 +294,169 @@ class SupabaseClient:
     
     def is_available(self) -> bool:
         """Check if Supabase client is available and configured."""
-        return self.client is not None
+        return self.client is not None or self.config.pool_enabled
+    
+    async def _execute_insert(
+        self,
+        table: str,
+        record: Dict[str, Any],
+        sql: str,
+        columns: Sequence[str],
+        on_conflict: Optional[str] = None
+    ) -> bool:
+        """
+        Insert a single record, preferring the shared asyncpg pool.
+        
+        When on_conflict names a unique column the REST path upserts on it;
+        the pooled path expects sql to carry the matching ON CONFLICT clause.
+        
+        Returns:
+            True if the row was written
+        """
+        if self.config.pool_enabled:
+            pool = await get_pg_pool(self.config.database_url)
+            async with pool.acquire() as conn:
+                await conn.execute(sql, *_record_to_args(record, columns))
+            return True
+        
+        table_query = self.client.table(table)
+        if on_conflict:
+            result = table_query.upsert(record, on_conflict=on_conflict).execute()
+        else:
+            result = table_query.insert(record).execute()
+        return bool(result.data)
+    
+    @staticmethod
+    def _build_lead_record(
+        lead_data: LeadData,
+        request_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the row inserted into the leads table."""
+        return {
+            "id": str(uuid.uuid4()),
+            "analysis_id": lead_data.analysis_id or request_id,
+            "manager_name": lead_data.manager_name,
+            "email": lead_data.email,
+            "phone": lead_data.phone,
+            "store_name": lead_data.store_name,
+            "store_address": lead_data.store_address,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+    
+    @staticmethod
+    def _build_metadata_record(metadata: AnalysisMetadata) -> Dict[str, Any]:
+        """Build the row inserted into the analysis_metadata table."""
+        return {
+            "request_id": metadata.request_id,
+            "original_filename": metadata.original_filename,
+            "status": metadata.status,
+            "file_size": metadata.file_size,
+            "file_type": metadata.file_type,
+            "employee_count": metadata.employee_count,
+            "total_violations": metadata.total_violations,
+            "total_hours": metadata.total_hours,
+            "overtime_cost": metadata.overtime_cost,
+            "processing_time_seconds": metadata.processing_time_seconds,
+            "error_message": metadata.error_message,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+    
+    async def _insert_many(
+        self,
+        table: str,
+        records: List[Dict[str, Any]],
+        sql: str,
+        columns: Sequence[str],
+        on_conflict: Optional[str] = None
+    ) -> int:
+        """
+        Insert many records in as few round-trips as possible.
+        
+        With the asyncpg pool, batches up to COPY_THRESHOLD rows go through one
+        executemany call and larger ones through a single binary COPY; over
+        REST there is one msgspec-encoded POST per chunk of
+        BULK_INSERT_CHUNK_SIZE rows. on_conflict makes the executemany and
+        REST paths upsert. COPY always appends and fails on a duplicate key,
+        so upserts use executemany whatever the batch size.
+        
+        Returns:
+            Number of rows written
+        """
+        if self.config.pool_enabled:
+            args = [_record_to_args(record, columns) for record in records]
+            pool = await get_pg_pool(self.config.database_url)
+            async with pool.acquire() as conn:
+                if not on_conflict and len(args) > COPY_THRESHOLD:
+                    await conn.copy_records_to_table(
+                        table, records=args, columns=list(columns)
+                    )
+                else:
+                    await conn.executemany(sql, args)
+            return len(records)
+        
+        for start in range(0, len(records), BULK_INSERT_CHUNK_SIZE):
+            await self._do_insert(
+                table, records[start:start + BULK_INSERT_CHUNK_SIZE], on_conflict
+            )
+        return len(records)
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the HTTP client used for direct PostgREST requests."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                http2=True, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT
+            )
+        return self._http
+    
+    def get_analysis_logger(self) -> "AsyncAnalysisLogger":
+        """Get the batch writer that queues analysis metadata for this client."""
+        if self._analysis_logger is None:
+            self._analysis_logger = AsyncAnalysisLogger(self)
+        return self._analysis_logger
+    
+    async def aclose(self) -> None:
+        """Drain queued analysis metadata, then close the shared HTTP clients."""
+        if self._analysis_logger is not None:
+            await self._analysis_logger.close()
+            self._analysis_logger = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._sync_http is not None:
+            self._sync_http.close()
+            self._sync_http = None
+    
+    async def _do_insert(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: Optional[str] = None
+    ) -> None:
+        """
+        POST pre-encoded rows straight to the PostgREST endpoint for a table.
+        
+        Bypasses supabase-py's dict-to-json path: the payload is encoded once
+        with msgspec and sent as raw bytes. With on_conflict, existing rows
+        with the same key are merged instead of duplicated.
+        """
+        prefer = "return=minimal"
+        params = {}
+        if on_conflict:
+            prefer = f"resolution=merge-duplicates,{prefer}"
+            params["on_conflict"] = on_conflict
+        
+        response = await self._get_http_client().post(
+            f"{self.config.supabase_url}/rest/v1/{table}",
+            content=_json_encoder.encode(rows),
+            params=params,
+            headers={
+                "apikey": self.config.supabase_key,
+                "Authorization": f"Bearer {self.config.supabase_key}",
+                "Content-Type": "application/json",
+                "Prefer": prefer,
+            }
+        )
+        response.raise_for_status()
     
     async def log_lead_information(
         self,
@@ -124,25 +489,16 @@ class SupabaseClient:
             }
         
         try:
-            # Generate unique lead ID
-            lead_id = str(uuid.uuid4())
-            
             # Prepare data for insertion
-            lead_record = {
-                "id": lead_id,
-                "analysis_id": lead_data.analysis_id or request_id,
-                "manager_name": lead_data.manager_name,
-                "email": lead_data.email,
-                "phone": lead_data.phone,
-                "store_name": lead_data.store_name,
-                "store_address": lead_data.store_address,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
+            lead_record = self._build_lead_record(lead_data, request_id)
+            lead_id = lead_record["id"]
             
             # Insert into Supabase
-            result = self.client.table("leads").insert(lead_record).execute()
+            inserted = await _with_retry(lambda: self._execute_insert(
+                "leads", lead_record, INSERT_LEAD_SQL, LEAD_COLUMNS
+            ))
             
-            if result.data:
+            if inserted:
                 operation_logger.info(
                     f"Lead successfully logged to Supabase | "
                     f"Manager: {lead_data.manager_name} | "
@@ -214,25 +570,17 @@ class SupabaseClient:
         
         try:
             # Prepare metadata record
-            metadata_record = {
-                "request_id": metadata.request_id,
-                "original_filename": metadata.original_filename,
-                "status": metadata.status,
-                "file_size": metadata.file_size,
-                "file_type": metadata.file_type,
-                "employee_count": metadata.employee_count,
-                "total_violations": metadata.total_violations,
-                "total_hours": metadata.total_hours,
-                "overtime_cost": metadata.overtime_cost,
-                "processing_time_seconds": metadata.processing_time_seconds,
-                "error_message": metadata.error_message,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
+            metadata_record = self._build_metadata_record(metadata)
             
             # Insert into Supabase
-            result = self.client.table("analysis_metadata").insert(metadata_record).execute()
+            # Upsert on request_id so retries and repeated calls never duplicate rows
+            inserted = await _with_retry(lambda: self._execute_insert(
+                "analysis_metadata", metadata_record,
+                UPSERT_ANALYSIS_SQL, ANALYSIS_METADATA_COLUMNS,
+                on_conflict="request_id"
+            ))
             
-            if result.data:
+            if inserted:
                 operation_logger.info(
                     f"Analysis metadata logged to Supabase | "
                     f"Request ID: {metadata.request_id} | "
@@ -271,6 +619,160 @@ class SupabaseClient:
                 "error": error_msg
             }
     
+    def log_analysis_metadata_nowait(self, metadata: AnalysisMetadata) -> asyncio.Task:
+        """
+        Schedule analysis metadata logging without waiting for Supabase.
+        
+        Keeps the Supabase round-trip off the request path. The outcome is
+        logged when the background task finishes. Must be called from
+        within a running event loop.
+        
+        Args:
+            metadata: Analysis metadata to store
+            
+        Returns:
+            The scheduled asyncio.Task, which callers may await if needed
+        """
+        task = asyncio.create_task(self.log_analysis_metadata(metadata))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._on_background_log_done)
+        return task
+    
+    def _on_background_log_done(self, task: asyncio.Task) -> None:
+        """Release a finished background logging task and report failures."""
+        self._bg_tasks.discard(task)
+        if task.cancelled():
+            logger.warning("Background Supabase logging task was cancelled")
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error(f"Background Supabase logging failed: {error}")
+        elif not task.result().get("success"):
+            logger.warning(
+                f"Background Supabase logging failed: {task.result().get('error', 'Unknown error')}"
+            )
+    
+    async def wait_for_background_tasks(self) -> None:
+        """Wait for all pending fire-and-forget logging tasks to finish."""
+        if self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+    
+    async def log_leads_bulk(
+        self,
+        leads: List[LeadData],
+        request_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Log many leads to Supabase using batched inserts.
+        
+        Rows are sent in chunks of BULK_INSERT_CHUNK_SIZE so a large batch
+        costs one round-trip per chunk instead of one per lead.
+        
+        Args:
+            leads: Lead records to store
+            request_id: Optional request ID used when a lead has no analysis_id
+            
+        Returns:
+            Dictionary with success status, inserted count and lead IDs
+        """
+        operation_logger = get_logger("supabase", {"request_id": request_id})
+        
+        if not self.is_available():
+            error_msg = "Supabase client not available"
+            operation_logger.warning(error_msg)
+            log_database_operation(operation_logger, "BULK INSERT", "leads", False, None, error_msg)
+            return {
+                "success": False,
+                "error": error_msg,
+                "fallback": "Lead data not stored in Supabase (client unavailable)"
+            }
+        
+        if not leads:
+            return {"success": True, "inserted": 0, "lead_ids": []}
+        
+        try:
+            lead_records = [self._build_lead_record(lead, request_id) for lead in leads]
+            inserted = await self._insert_many(
+                "leads", lead_records, INSERT_LEAD_SQL, LEAD_COLUMNS
+            )
+            
+            operation_logger.info(f"Bulk logged {inserted}/{len(lead_records)} leads to Supabase")
+            log_database_operation(operation_logger, "BULK INSERT", "leads", True)
+            
+            return {
+                "success": True,
+                "inserted": inserted,
+                "lead_ids": [record["id"] for record in lead_records]
+            }
+            
+        except Exception as e:
+            error_msg = f"Failed to bulk log leads to Supabase: {str(e)}"
+            operation_logger.error(error_msg)
+            log_database_operation(
+                operation_logger, "BULK INSERT", "leads", False, None, error_msg
+            )
+            return {
+                "success": False,
+                "error": error_msg
+            }
+    
+    async def log_analyses_bulk(
+        self,
+        metadata_list: List[AnalysisMetadata]
+    ) -> Dict[str, Any]:
+        """
+        Log many analysis metadata records to Supabase using batched inserts.
+        
+        Args:
+            metadata_list: Analysis metadata records to store
+            
+        Returns:
+            Dictionary with success status, inserted count and request IDs
+        """
+        if not self.is_available():
+            error_msg = "Supabase client not available"
+            logger.warning(error_msg)
+            log_database_operation(
+                logger, "BULK INSERT", "analysis_metadata", False, None, error_msg
+            )
+            return {
+                "success": False,
+                "error": error_msg,
+                "fallback": "Analysis metadata not stored in Supabase (client unavailable)"
+            }
+        
+        if not metadata_list:
+            return {"success": True, "inserted": 0, "request_ids": []}
+        
+        try:
+            metadata_records = [self._build_metadata_record(m) for m in metadata_list]
+            # Upserting on request_id makes a retried batch safe to write again
+            inserted = await _with_retry(lambda: self._insert_many(
+                "analysis_metadata", metadata_records,
+                UPSERT_ANALYSIS_SQL, ANALYSIS_METADATA_COLUMNS,
+                on_conflict="request_id"
+            ))
+            
+            logger.info(f"Bulk logged {inserted}/{len(metadata_records)} analysis records to Supabase")
+            log_database_operation(logger, "BULK INSERT", "analysis_metadata", True)
+            
+            return {
+                "success": True,
+                "inserted": inserted,
+                "request_ids": [m.request_id for m in metadata_list]
+            }
+            
+        except Exception as e:
+            error_msg = f"Failed to bulk log analysis metadata to Supabase: {str(e)}"
+            logger.error(error_msg)
+            log_database_operation(
+                logger, "BULK INSERT", "analysis_metadata", False, None, error_msg
+            )
+            return {
+                "success": False,
+                "error": error_msg
+            }
+    
     async def get_analysis_history(
         self,
         limit: int = 50,
@@ -286,7 +788,7 @@ class SupabaseClient:
         Returns:
             Dictionary with success status and analysis history data
         """
-        if not self.is_available():
+        if self.client is None:
             return {
                 "success": False,
                 "error": "Supabase client not available",
@@ -329,7 +831,7 @@ class SupabaseClient:
         Returns:
             Dictionary with lead statistics or error information
         """
-        if not self.is_available():
+        if self.client is None:
             return {
                 "success": False,
                 "error": "Supabase client not available"
@@ -373,20 +875,164 @@ class SupabaseClient:
                 "error": error_msg
             }
 
-# Global Supabase client instance
-_supabase_client: Optional[SupabaseClient] = None
+# Sentinel telling the AsyncAnalysisLogger writer to flush and exit
+_STOP_WRITER = object()
+
+class AsyncAnalysisLogger:
+    """
+    Queue analysis metadata and write it to Supabase in batches.
+    
+    A single writer task drains a bounded queue and flushes through
+    SupabaseClient.log_analyses_bulk once batch_size rows are buffered or
+    flush_interval seconds have passed, whichever comes first. When the
+    queue is full, records fall back to an individual background write.
+    """
+    
+    def __init__(
+        self,
+        client: SupabaseClient,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000
+    ):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+        # Records written individually because the queue was full or closed
+        self.direct_writes = 0
+        # Records dropped because their batch could not be written
+        self.failed_writes = 0
+    
+    def enqueue(self, metadata: AnalysisMetadata) -> bool:
+        """
+        Queue analysis metadata for the next batch write.
+        
+        Must be called from within a running event loop; the writer task is
+        started on first use.
+        
+        Returns:
+            True if the record was queued, False if it was written directly
+        """
+        if self._closed:
+            self._write_directly(metadata)
+            return False
+        
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._writer_loop())
+        
+        try:
+            self._queue.put_nowait(metadata)
+        except asyncio.QueueFull:
+            self._write_directly(metadata)
+            return False
+        return True
+    
+    def _write_directly(self, metadata: AnalysisMetadata) -> None:
+        """Fall back to an individual fire-and-forget write."""
+        self.direct_writes += 1
+        logger.warning("Analysis log queue unavailable, writing metadata directly")
+        self.client.log_analysis_metadata_nowait(metadata)
+    
+    async def _writer_loop(self) -> None:
+        """Drain the queue, flushing on batch size or elapsed time."""
+        loop = asyncio.get_running_loop()
+        batch: List[AnalysisMetadata] = []
+        deadline = loop.time() + self.flush_interval
+        
+        stopping = False
+        
+        while not stopping:
+            try:
+                item = await asyncio.wait_for(
+                    self._queue.get(), timeout=max(deadline - loop.time(), 0)
+                )
+            except asyncio.TimeoutError:
+                item = None
+            
+            # Take whatever else is already queued without another wait
+            while item is not None:
+                if item is _STOP_WRITER:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    item = None
+            
+            if len(batch) >= self.batch_size or loop.time() >= deadline:
+                if batch:
+                    await self._flush(batch)
+                    batch = []
+                deadline = loop.time() + self.flush_interval
+        
+        if batch:
+            await self._flush(batch)
+    
+    async def _flush(self, batch: List[AnalysisMetadata]) -> None:
+        """
+        Write one batch, logging rather than raising on failure.
+        
+        log_analyses_bulk already retries transient errors, so a batch that
+        still fails is dropped with a warning naming every request ID in it.
+        """
+        try:
+            result = await self.client.log_analyses_bulk(batch)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if not result.get("success"):
+            self.failed_writes += len(batch)
+            logger.warning(
+                f"Batched analysis logging failed, dropping {len(batch)} records: "
+                f"{result.get('error', 'Unknown error')} | "
+                f"Request IDs: {', '.join(m.request_id for m in batch)}"
+            )
+    
+    async def close(self) -> None:
+        """Stop accepting records and wait for everything queued to be written."""
+        self._closed = True
+        if self._writer is not None:
+            await self._queue.put(_STOP_WRITER)
+            await self._writer
+            self._writer = None
+
+# One Supabase client per event loop, since its HTTP clients and background
+# tasks belong to the loop they were created on. Entries disappear with their loop.
+_supabase_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SupabaseClient]" = weakref.WeakKeyDictionary()
+# Client handed out when no event loop is running (e.g. scripts and sync code)
+_default_supabase_client: Optional[SupabaseClient] = None
 
 def get_supabase_client() -> SupabaseClient:
     """
-    Get the global Supabase client instance.
+    Get the Supabase client instance for the running event loop.
     
     Returns:
-        SupabaseClient instance
+        SupabaseClient instance (the same one for every call on a given loop)
     """
-    global _supabase_client
-    if _supabase_client is None:
-        _supabase_client = SupabaseClient()
-    return _supabase_client
+    global _default_supabase_client
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        if _default_supabase_client is None:
+            _default_supabase_client = SupabaseClient()
+        return _default_supabase_client
+    
+    client = _supabase_clients.get(loop)
+    if client is None:
+        client = _supabase_clients[loop] = SupabaseClient()
+    return client
+
+async def close_supabase_client() -> None:
+    """Flush background logging and close the running loop's client connections."""
+    client = _supabase_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.wait_for_background_tasks()
+        await client.aclose()
 
 # Convenience functions for easy integration
 
@@ -479,4 +1125,45 @@ async def log_analysis_to_supabase(
         error_message=error_message
     )
     
-    return await client.log_analysis_metadata(metadata) 
\ No newline at end of file
+    return await client.log_analysis_metadata(metadata)
+
+def log_analysis_to_supabase_nowait(
+    request_id: str,
+    original_filename: str,
+    status: str,
+    file_size: Optional[int] = None,
+    file_type: Optional[str] = None,
+    employee_count: Optional[int] = None,
+    total_violations: Optional[int] = None,
+    total_hours: Optional[float] = None,
+    overtime_cost: Optional[float] = None,
+    processing_time_seconds: Optional[float] = None,
+    error_message: Optional[str] = None
+) -> bool:
+    """
+    Fire-and-forget variant of log_analysis_to_supabase.
+    
+    Queues the record on the client's AsyncAnalysisLogger so request handlers
+    do not wait on the database round-trip and bursts are written in
+    batches. Arguments match log_analysis_to_supabase.
+    
+    Returns:
+        True if the record was queued, False if it fell back to a direct write
+    """
+    client = get_supabase_client()
+    
+    metadata = AnalysisMetadata(
+        request_id=request_id,
+        original_filename=original_filename,
+        status=status,
+        file_size=file_size,
+        file_type=file_type,
+        employee_count=employee_count,
+        total_violations=total_violations,
+        total_hours=total_hours,
+        overtime_cost=overtime_cost,
+        processing_time_seconds=processing_time_seconds,
+        error_message=error_message
+    )
+    
+    return client.get_analysis_logger().enqueue(metadata) 
\ No newline at end of file
@@ -20,6 +20,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints.analysis import router as analysis_router
 from app.api.endpoints.reports import router as reports_router
 from app.db import create_tables
+from app.db.supabase_client import close_pg_pool, close_supabase_client
+from llm_utils.google_utils import aclose_client as close_gemini_client
 from app.core.logging_config import ensure_logging_initialized, get_logger
 # Import error handlers for task 5.3
 from app.core.error_handlers import (
@@ -67,6 +69,13 @@ app.add_exception_handler(Exception, general_exception_handler)
 app.include_router(analysis_router, prefix="/api", tags=["analysis"])
 app.include_router(reports_router, prefix="/api/reports", tags=["reports"])
 
+@app.on_event("shutdown")
+async def shutdown_supabase():
+    """Flush background Supabase logging and release pooled connections (database and Gemini) on shutdown."""
+    await close_supabase_client()
+    await close_pg_pool()
+    await close_gemini_client()
+
 @app.get("/")
 async def root():
     """Root endpoint for health check."""
@@ -0,0 +1,80 @@
+import pytest
+
+from llm_utils import google_utils
+
+
+def test_only_the_head_of_a_text_upload_reaches_the_prompt(monkeypatch):
+    monkeypatch.setattr(google_utils, "FILE_TEXT_MAX_BYTES", 6)
+
+    model_name, contents = google_utils._build_simple_request("Summarize", "Zoë,8h\nBob,7h\n".encode(), "hours.csv", "text/csv")
+
+    assert model_name == google_utils.GOOGLE_DEFAULT_MODEL
+    assert len(contents) == 1
+    assert "Zoë,8" in contents[0] and "Bob" not in contents[0]
+
+
+def test_text_upload_cut_inside_a_character_drops_the_fragment(monkeypatch):
+    monkeypatch.setattr(google_utils, "FILE_TEXT_MAX_BYTES", 3)  # keeps only the first of the two bytes of "ë"
+
+    _, contents = google_utils._build_simple_request("Summarize", "Zoë".encode(), "names.csv", "text/csv")
+
+    assert "Zo\\n--- End of File Content ---" in contents[0]
+
+
+def test_simple_api_errors_get_one_matching_hint():
+    from google.genai import errors as genai_errors
+
+    quota = genai_errors.ClientError(429, {"error": {"message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}})
+    missing = genai_errors.ClientError(404, {"error": {"message": "models/x is not found", "status": "NOT_FOUND"}})
+    other = genai_errors.ServerError(500, {"error": {"message": "Internal", "status": "INTERNAL"}})
+
+    assert google_utils._simple_api_error_message(quota, "flash").endswith("You may have exceeded your API quota (Rate Limit).")
+    assert "model 'models/flash'" in google_utils._simple_api_error_message(missing, "flash")
+    assert google_utils._simple_api_error_message(other, "flash").startswith("Google API Error (ServerError): 500 INTERNAL")
+
+
+def test_key_pool_rotates_generate_calls_but_pins_uploaded_files(monkeypatch):
+    from google.genai import types as genai_types
+
+    primary, extra = object(), object()
+    monkeypatch.setattr(google_utils, "client", primary)
+    monkeypatch.setattr(google_utils, "_extra_clients", [(extra, google_utils._new_rate_limiter())])
+
+    picked = [google_utils._next_client(["prompt"])[0] for _ in range(4)]
+    uploaded = genai_types.File(name="files/abc", uri="https://example.invalid/files/abc", mime_type="image/png")
+
+    assert picked.count(primary) == 2 and picked.count(extra) == 2
+    assert all(google_utils._next_client(["prompt", uploaded])[0] is primary for _ in range(3))
+
+
+def test_single_key_uses_the_primary_client_and_limiter(monkeypatch):
+    monkeypatch.setattr(google_utils, "_extra_clients", [])
+
+    assert google_utils._next_client(["prompt"]) == (google_utils.client, google_utils._RATE_LIMITER)
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_its_concurrency_slot_until_the_last_chunk(monkeypatch):
+    from types import SimpleNamespace
+    from llm_utils.rate_limit import TokenBucket
+
+    limiter = TokenBucket(rate=None, max_concurrency=1)
+    slot_taken = []
+
+    async def chunks():
+        for text in ("40 ", "hours"):
+            slot_taken.append(limiter._async_slots().locked())
+            yield SimpleNamespace(text=text)
+
+    async def generate_content_stream(**kwargs):
+        return chunks()
+
+    fake_client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate_content_stream)))
+    monkeypatch.setattr(google_utils, "client", fake_client)
+    monkeypatch.setattr(google_utils, "_next_client", lambda contents: (fake_client, limiter))
+
+    streamed = [chunk async for chunk in google_utils.aget_google_gemini_response_stream("how many hours?")]
+
+    assert streamed == ["40 ", "hours"]
+    assert slot_taken == [True, True]
+    assert not limiter._async_slots().locked()
@@ -0,0 +1,62 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from app.core import llm_cache
+from app.models.schemas import LLMProcessingOutput, LLMParsedPunchEvent
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def _parsed_output(punch_count: int = 1) -> LLMProcessingOutput:
+    return LLMProcessingOutput(
+        punch_events=[
+            LLMParsedPunchEvent(
+                employee_identifier_in_file="BB - xxxxxxxxx / 649190 / Cashier",
+                timestamp=datetime(2025, 3, 27, 17, 5),
+                punch_type_as_parsed="Clock In"
+            )
+            for _ in range(punch_count)
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_cached_parse_hits_cache_on_repeat(cache_dir, monkeypatch):
+    mock_parse = AsyncMock(return_value=_parsed_output())
+    monkeypatch.setattr(llm_cache.llm_processing, "parse_file_to_structured_data", mock_parse)
+
+    first = await llm_cache.cached_parse(b"a,b\n1,2\n", "text/csv", "test.csv")
+    second = await llm_cache.cached_parse("a,b\n1,2\n", "text/csv", "test.csv")
+
+    assert mock_parse.await_count == 1
+    assert second == first
+    assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_parse_key_includes_mime_type_and_filename(cache_dir, monkeypatch):
+    mock_parse = AsyncMock(return_value=_parsed_output())
+    monkeypatch.setattr(llm_cache.llm_processing, "parse_file_to_structured_data", mock_parse)
+
+    await llm_cache.cached_parse(b"a,b\n", "text/csv", "test.csv")
+    await llm_cache.cached_parse(b"a,b\n", "text/plain", "test.csv")
+    await llm_cache.cached_parse(b"a,b\n", "text/csv", "other.csv")
+
+    assert mock_parse.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_parse_does_not_cache_empty_results(cache_dir, monkeypatch):
+    mock_parse = AsyncMock(return_value=_parsed_output(punch_count=0))
+    monkeypatch.setattr(llm_cache.llm_processing, "parse_file_to_structured_data", mock_parse)
+
+    await llm_cache.cached_parse(b"garbage", "text/csv", "test.csv")
+    await llm_cache.cached_parse(b"garbage", "text/csv", "test.csv")
+
+    assert mock_parse.await_count == 2
+    assert not list(cache_dir.glob("*.pkl"))
@@ -0,0 +1,29 @@
+import pytest
+
+from llm_utils.errors import (
+    LLMAPIError, LLMAuthError, LLMBlockedError, LLMRateLimitError, error_from_message, raise_for_error
+)
+
+
+@pytest.mark.parametrize("message, error_class", [
+    ("Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created.", LLMAuthError),
+    ("OpenAI API Rate Limit Exceeded: slow down", LLMRateLimitError),
+    ("Error: Google API blocked the prompt. Reason: SAFETY.", LLMBlockedError),
+    ("Google API Error (ServerError): 500 INTERNAL.", LLMAPIError),
+])
+def test_error_strings_map_to_typed_errors(message, error_class):
+    error = error_from_message(message)
+
+    assert type(error) is error_class
+    assert str(error) == message
+
+
+def test_answers_pass_through_unchanged():
+    assert error_from_message("Bob worked 40 hours") is None
+    assert error_from_message("Errors found: 2 missed meal breaks") is None
+    assert raise_for_error("Error rate looks normal this week") == "Error rate looks normal this week"
+    assert error_from_message("OpenAI API usage is not needed here") is None
+    assert raise_for_error({"punch_events": []}) == {"punch_events": []}
+
+    with pytest.raises(LLMRateLimitError):
+        raise_for_error("Google API Error (ClientError): 429 RESOURCE_EXHAUSTED.")
@@ -0,0 +1,49 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from llm_utils import google_utils
+
+
+TOOLS = [{"name": "parse", "description": "d", "parameters": {"type": "object", "required": ["punch_events"]}}]
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr(google_utils, "client", object())
+    monkeypatch.setattr(google_utils, "ESCALATION_STATS", {"calls": 0, "escalations": 0})
+
+
+@pytest.mark.asyncio
+async def test_valid_answer_stays_on_requested_model(fake_client, monkeypatch):
+    once = AsyncMock(return_value={"punch_events": []})
+    monkeypatch.setattr(google_utils, "_function_calling_once_async", once)
+
+    result = await google_utils.get_gemini_response_with_function_calling_async(["p"], TOOLS, model_name_override="flash")
+
+    assert result == {"punch_events": []}
+    assert once.await_count == 1
+    assert google_utils.ESCALATION_STATS == {"calls": 1, "escalations": 0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("first_answer", ["", {"unexpected": 1}, "Error: LLM response was empty or incomplete. Finish Reason: SAFETY."])
+async def test_unusable_answer_is_retried_on_escalation_model(fake_client, monkeypatch, first_answer):
+    once = AsyncMock(side_effect=[first_answer, {"punch_events": [1]}])
+    monkeypatch.setattr(google_utils, "_function_calling_once_async", once)
+
+    result = await google_utils.get_gemini_response_with_function_calling_async(["p"], TOOLS, model_name_override="flash")
+
+    assert result == {"punch_events": [1]}
+    assert once.await_args_list[1].args[2] == google_utils.GOOGLE_ESCALATION_MODEL
+    assert google_utils.ESCALATION_STATS == {"calls": 1, "escalations": 1}
+
+
+@pytest.mark.asyncio
+async def test_escalation_can_be_disabled(fake_client, monkeypatch):
+    once = AsyncMock(return_value="")
+    monkeypatch.setattr(google_utils, "_function_calling_once_async", once)
+
+    result = await google_utils.get_gemini_response_with_function_calling_async(["p"], TOOLS, escalate=False)
+
+    assert result == ""
+    assert once.await_count == 1
@@ -0,0 +1,28 @@
+from llm_utils import openai_utils
+
+
+def test_openai_client_is_created_once(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(openai_utils, "_openai_client", None)
+
+    assert openai_utils._get_client() is openai_utils._get_client()
+
+
+def test_reload_keys_picks_up_a_new_key(monkeypatch):
+    for name in ("_OPENAI_API_KEY", "_openai_client", "_async_openai_client"):
+        monkeypatch.setattr(openai_utils, name, None)  # restored after the test
+    monkeypatch.setenv("OPENAI_API_KEY", "from-dotenv")
+
+    openai_utils.reload_keys()
+
+    assert openai_utils._OPENAI_API_KEY == "from-dotenv"
+    assert openai_utils._get_client().api_key == "from-dotenv"
+
+
+def test_legacy_completion_helper_uses_the_chat_api():
+    assert openai_utils.get_openai_response is openai_utils.get_openai_chat_response
+
+
+def test_openai_calls_are_not_paced_unless_a_rate_is_configured():
+    assert openai_utils._RATE_LIMITER.rate is None
+    assert openai_utils._RATE_LIMITER.max_concurrency == 20
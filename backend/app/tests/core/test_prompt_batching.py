@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from llm_utils.batching import BatchedDispatcher
+from llm_utils.errors import LLMAPIError, LLMError, LLMRateLimitError
+
+
+@pytest.mark.asyncio
+async def test_concurrent_prompts_share_one_batch():
+    calls = []
+
+    async def send_batch(prompts):
+        calls.append(prompts)
+        return [f"answer to {prompt}" for prompt in prompts]
+
+    dispatcher = BatchedDispatcher(send_batch, window_ms=20, max_batch=8)
+    answers = await asyncio.gather(*(dispatcher.submit(f"q{i}") for i in range(3)))
+
+    assert calls == [["q0", "q1", "q2"]]
+    assert answers == ["answer to q0", "answer to q1", "answer to q2"]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_dispatches_without_waiting_for_window():
+    calls = []
+
+    async def send_batch(prompts):
+        calls.append(prompts)
+        return prompts
+
+    dispatcher = BatchedDispatcher(send_batch, window_ms=10_000, max_batch=2)
+    answers = await asyncio.wait_for(asyncio.gather(dispatcher.submit("a"), dispatcher.submit("b")), timeout=1)
+
+    assert answers == ["a", "b"]
+    assert calls == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_failures_reach_only_the_affected_callers():
+    async def send_batch(prompts):
+        return [ValueError(prompt) if prompt == "bad" else prompt for prompt in prompts]
+
+    dispatcher = BatchedDispatcher(send_batch, window_ms=20)
+    good, bad = await asyncio.gather(dispatcher.submit("good"), dispatcher.submit("bad"), return_exceptions=True)
+
+    assert good == "good"
+    assert isinstance(bad, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_gather_prompts_runs_concurrently_and_keeps_order(monkeypatch):
+    from llm_utils import google_utils
+
+    in_flight, peak = 0, 0
+
+    async def answer(prompt, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if prompt == "bad":
+            raise ValueError(prompt)
+        if prompt == "limited":
+            return "Google API Error (ClientError): 429 RESOURCE_EXHAUSTED. You may have exceeded your API quota (Rate Limit)."
+        return f"answer to {prompt}"
+
+    monkeypatch.setattr(google_utils, "aget_google_gemini_response", answer)
+    results = await google_utils.gather_prompts(["q0", "bad", "q2", "limited"])
+
+    assert results[0] == "answer to q0" and results[2] == "answer to q2"
+    assert isinstance(results[1], LLMAPIError)
+    assert isinstance(results[3], LLMRateLimitError)
+    assert peak == 4
+
+
+@pytest.mark.asyncio
+async def test_gemini_batch_packs_prompts_and_keeps_order(monkeypatch):
+    from llm_utils import google_utils
+
+    sent = []
+
+    async def send_batch(prompts):
+        sent.append(prompts)
+        if "bad" in prompts:
+            raise RuntimeError("boom")
+        return [f"answer to {prompt}" for prompt in prompts]
+
+    monkeypatch.setattr(google_utils, "client", object())
+    monkeypatch.setattr(google_utils, "_send_prompt_batch", send_batch)
+    answers = await google_utils.aget_google_gemini_batch(["q0", "q1", "q2", "bad", "q4"], batch_size=2)
+
+    assert sent == [["q0", "q1"], ["q2", "bad"], ["q4"]]
+    assert answers[:2] == ["answer to q0", "answer to q1"] and answers[4] == "answer to q4"
+    assert isinstance(answers[2], LLMError) and isinstance(answers[3], LLMError)
+
+
+@pytest.mark.asyncio
+async def test_join_gemini_stream_returns_text_or_the_error_chunk():
+    from llm_utils.google_utils import ajoin_gemini_stream
+
+    async def stream(*chunks):
+        for chunk in chunks:
+            yield chunk
+
+    assert await ajoin_gemini_stream(stream("40 ", "hours")) == "40 hours"
+    assert await ajoin_gemini_stream(stream("40 ", "Google API Error (ServerError): 503")) == "Google API Error (ServerError): 503"
@@ -0,0 +1,143 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+from google.genai import errors as genai_errors
+
+from llm_utils import google_utils
+from llm_utils.google_utils import MAX_BACKOFF_SECONDS, _backoff_seconds, _server_retry_delay
+from llm_utils.rate_limit import TokenBucket
+
+
+def test_burst_up_to_capacity_does_not_wait():
+    bucket = TokenBucket(rate=1, capacity=3)
+    start = time.monotonic()
+    for _ in range(3):
+        with bucket:
+            pass
+
+    assert time.monotonic() - start < 0.1
+
+
+@pytest.mark.asyncio
+async def test_callers_beyond_capacity_are_spaced_by_the_refill_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    finished = []
+
+    async def call():
+        async with bucket:
+            finished.append(time.monotonic())
+
+    start = time.monotonic()
+    await asyncio.gather(*(call() for _ in range(3)))
+
+    # One token up front, then one every 1/20s
+    assert finished[-1] - start == pytest.approx(0.1, abs=0.05)
+
+
+def test_backoff_jitter_is_capped_and_reproducible_with_a_seeded_rng(monkeypatch):
+    monkeypatch.setattr(google_utils, "_backoff_random", random.Random(7))
+    first = [_backoff_seconds(1.0, attempt) for attempt in range(8)]
+    monkeypatch.setattr(google_utils, "_backoff_random", random.Random(7))
+    second = [_backoff_seconds(1.0, attempt) for attempt in range(8)]
+
+    assert first == second
+    assert all(0 <= delay <= min(MAX_BACKOFF_SECONDS, 2 ** attempt) for attempt, delay in enumerate(first))
+
+    # The retry loops draw their jitter from the same generator
+    monkeypatch.setattr(google_utils, "_backoff_random", random.Random(7))
+    assert google_utils._retry_delay(ConnectionError(), 1.0, 0) == first[0]
+
+
+def test_server_retry_delay_comes_from_retry_info():
+    error = genai_errors.ClientError(429, {"error": {
+        "code": 429, "status": "RESOURCE_EXHAUSTED", "message": "quota",
+        "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "23s"}]
+    }})
+
+    assert _server_retry_delay(error) == 23.0
+    assert _server_retry_delay(genai_errors.ClientError(400, {"error": {"message": "bad"}})) is None
+
+
+@pytest.mark.asyncio
+async def test_simple_calls_retry_rate_limits_but_not_bad_requests(monkeypatch):
+    attempts = []
+
+    class Models:
+        async def generate_content(self, **kwargs):
+            attempts.append(kwargs)
+            if len(attempts) == 1:
+                raise genai_errors.ClientError(429, {"error": {"message": "Resource exhausted", "details": [{"retryDelay": "0s"}]}})
+            raise genai_errors.ClientError(400, {"error": {"message": "Bad request"}})
+
+    class FakeClient:
+        class aio:
+            models = Models()
+
+    monkeypatch.setattr(google_utils, "client", FakeClient())
+
+    with pytest.raises(genai_errors.ClientError) as excinfo:
+        await google_utils._agenerate_text("models/gemini", ["prompt"], google_utils._simple_generate_config(64))
+
+    assert excinfo.value.code == 400
+    assert len(attempts) == 2
+
+
+class _TooManyRequests(Exception):
+    code = 429
+
+
+def test_rate_limited_calls_slow_the_bucket_until_calls_succeed():
+    bucket = TokenBucket(rate=100, capacity=100)
+
+    with pytest.raises(_TooManyRequests):
+        with bucket:
+            raise _TooManyRequests()
+    assert bucket.rate == 50
+
+    for _ in range(20):
+        with bucket:
+            pass
+    assert bucket.rate == 100
+
+
+def test_bucket_without_a_rate_never_waits():
+    bucket = TokenBucket(rate=None)
+    start = time.monotonic()
+
+    with pytest.raises(_TooManyRequests):
+        with bucket:
+            raise _TooManyRequests()
+    for _ in range(100):
+        with bucket:
+            pass
+
+    assert time.monotonic() - start < 0.1
+    assert bucket.rate is None
+
+
+def test_gemini_calls_are_not_paced_unless_a_rate_is_configured(monkeypatch):
+    assert google_utils._new_rate_limiter().rate is None
+
+    monkeypatch.setitem(google_utils._RATE_LIMIT_CONFIG, "requests_per_minute", 600)
+    assert google_utils._new_rate_limiter().rate == 10
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_caps_calls_in_flight():
+    bucket = TokenBucket(rate=1000, capacity=1000, max_concurrency=2)
+    in_flight, peak = 0, 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with bucket:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
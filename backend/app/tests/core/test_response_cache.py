@@ -0,0 +1,167 @@
+import asyncio
+import importlib
+import threading
+
+import pytest
+
+from llm_utils import response_cache
+from llm_utils.response_cache import LLMCache, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LLMCache(path=str(tmp_path / "responses.db"))
+    monkeypatch.setattr(response_cache, "_cache", cache)
+    monkeypatch.setattr(response_cache, "CACHE_ENABLED", True)
+    return cache
+
+
+def test_round_trips_dict_and_str_responses(cache):
+    args = {"punch_events": [{"employee_identifier_in_file": "BB", "timestamp": "2025-03-27T17:05:00"}]}
+    cache.set("fc", args)
+    cache.set("text", "plain text")
+
+    assert cache.get("fc") == args
+    assert cache.get("text") == "plain text"
+    assert cache.get("missing") is None
+
+
+def test_expired_entries_are_misses(cache):
+    cache.set("key", "stale", ttl=-1)
+
+    assert cache.get("key") is None
+
+
+def test_key_covers_file_bytes_tools_and_temperature(cache):
+    contents = ["Parse this file", {"mime_type": "text/csv", "data": b"a,b\n1,2\n"}]
+    tools = [{"name": "extract", "description": "d", "parameters": {"type": "object"}}]
+    key = make_cache_key("models/gemini", contents, tools, 0.1)
+
+    assert key == make_cache_key("models/gemini", list(contents), tools, 0.1)
+    assert key != make_cache_key("models/gemini", ["Parse this file", {"mime_type": "text/csv", "data": b"a,b\n1,3\n"}], tools, 0.1)
+    assert key != make_cache_key("models/gemini", contents, None, 0.1)
+    assert key != make_cache_key("models/gemini", contents, tools, 0.0)
+
+
+def test_high_temperature_requests_bypass_cache(cache):
+    assert make_cache_key("models/gemini", ["prompt"], temperature=0.9) is None
+    assert response_cache.lookup("models/gemini", ["prompt"], temperature=0.9) == (None, None)
+
+
+def test_lookup_returns_stored_response(cache):
+    key, cached = response_cache.lookup("models/gemini", ["prompt"], temperature=0.0)
+    assert cached is None
+
+    response_cache.store(key, {"employees": ["BB"]})
+
+    assert response_cache.lookup("models/gemini", ["prompt"], temperature=0.0) == (key, {"employees": ["BB"]})
+
+
+def test_semantic_lookup_matches_close_prompts_only(cache):
+    key, _ = response_cache.lookup("models/gemini", ["summarize hours"], temperature=0.0)
+    response_cache.store(key, "40 hours")
+    response_cache.store_embedding(key, "models/gemini", response_cache.normalize([1.0, 0.0, 0.0]))
+
+    assert response_cache.semantic_lookup("models/gemini", response_cache.normalize([0.99, 0.05, 0.0])) == "40 hours"
+    assert response_cache.semantic_lookup("models/gemini", response_cache.normalize([0.5, 0.5, 0.0])) is None
+    assert response_cache.semantic_lookup("models/other", response_cache.normalize([1.0, 0.0, 0.0])) is None
+
+
+def test_generation_options_are_part_of_the_key(cache):
+    key = make_cache_key("models/gemini", ["prompt"], temperature=0.0)
+
+    assert key == make_cache_key("models/gemini", ["prompt"], temperature=0.0, options={})
+    assert key != make_cache_key("models/gemini", ["prompt"], temperature=0.0, options={"max_output_tokens": 512})
+
+
+def test_cache_is_off_unless_enabled(monkeypatch):
+    monkeypatch.setattr(response_cache, "CACHE_ENABLED", response_cache.CACHE_ENABLED)
+    monkeypatch.delenv("TIMESHEET_MAGIC_RESPONSE_CACHE", raising=False)
+    importlib.reload(response_cache)
+
+    assert response_cache.CACHE_ENABLED is False
+    assert make_cache_key("models/gemini", ["prompt"], temperature=0.0) is None
+
+
+@pytest.mark.asyncio
+async def test_async_helpers_use_a_worker_thread(cache, monkeypatch):
+    threads = []
+    get_cache = response_cache.get_response_cache
+
+    def tracking_get_cache():
+        threads.append(threading.get_ident())
+        return get_cache()
+
+    monkeypatch.setattr(response_cache, "get_response_cache", tracking_get_cache)
+
+    key, cached = await response_cache.alookup("models/gemini", ["prompt"], temperature=0.0)
+    assert cached is None
+    await response_cache.astore(key, "answer")
+
+    assert await response_cache.alookup("models/gemini", ["prompt"], temperature=0.0) == (key, "answer")
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+
+
+@pytest.fixture
+def semantic_google(cache, monkeypatch):
+    from llm_utils import google_utils
+
+    monkeypatch.setattr(google_utils, "client", object())
+    monkeypatch.setattr(response_cache, "SEMANTIC_CACHE_ENABLED", True)
+
+    async def embed(prompt):
+        return response_cache.normalize([1.0, 0.0])
+
+    monkeypatch.setattr(google_utils, "_aembed_prompt", embed)
+    return google_utils
+
+
+@pytest.mark.asyncio
+async def test_semantic_hit_never_calls_the_api(semantic_google, monkeypatch):
+    calls = []
+
+    async def generate(*args):
+        calls.append(args)
+        return "fresh answer"
+
+    monkeypatch.setattr(semantic_google, "_agenerate_text", generate)
+    monkeypatch.setattr(semantic_google, "PROMPT_BATCHING", False)
+    response_cache.store("earlier", "40 hours")
+    response_cache.store_embedding("earlier", semantic_google._DEFAULT_MODEL_PATH, response_cache.normalize([1.0, 0.0]))
+
+    assert await semantic_google.aget_google_gemini_response("how many hours?") == "40 hours"
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_cancels_the_pending_embedding(semantic_google, monkeypatch):
+    cancelled = asyncio.Event()
+
+    async def embed(prompt):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(semantic_google, "_aembed_prompt", embed)
+    key, _ = response_cache.lookup(
+        semantic_google._DEFAULT_MODEL_PATH, ["how many hours?"],
+        options=semantic_google._simple_cache_options(semantic_google.DEFAULT_MAX_OUTPUT_TOKENS, None)
+    )
+    response_cache.store(key, "40 hours")
+
+    assert await semantic_google.aget_google_gemini_response("how many hours?") == "40 hours"
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_semantic_miss_calls_the_api(semantic_google, monkeypatch):
+    async def generate(*args):
+        return "fresh answer"
+
+    monkeypatch.setattr(semantic_google, "_agenerate_text", generate)
+
+    assert await semantic_google.aget_google_gemini_response("how many hours?") == "fresh answer"
+    assert response_cache.semantic_lookup(semantic_google._DEFAULT_MODEL_PATH, response_cache.normalize([1.0, 0.0])) == "fresh answer"
@@ -31,6 +31,21 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _format_employee_row(index, result, estimates):
+    """Format the Pass 1 vs Pass 2 comparison line for a single employee result"""
+    employee_id = result.employee_identifier
+    actual_punches = len(result.punch_events)
+    estimated_punches = estimates.get(employee_id, 0)
+    
+    employee_accuracy = (actual_punches / estimated_punches * 100) if estimated_punches > 0 else 100
+    difference = actual_punches - estimated_punches
+    difference_sign = "+" if difference >= 0 else ""
+    
+    return (f"   {index:2d}. '{employee_id}':\n"
+            f"       Estimated: {estimated_punches} | Actual: {actual_punches} | "
+            f"Diff: {difference_sign}{difference} | Accuracy: {employee_accuracy:.1f}%")
+
+
 async def test_parallel_processing():
     """Test the parallel processing engine with real sample data"""
     
@@ -79,6 +94,12 @@ async def test_parallel_processing():
         print(f"✅ Discovery completed in {discovery_duration:.2f}s")
         print(f"✅ Found {len(discovery_result.employees)} employees:")
         
+        # Index Pass 1 estimates by identifier once so later lookups are O(1)
+        estimates = {
+            emp.employee_identifier_in_file: emp.punch_count_estimate
+            for emp in discovery_result.employees
+        }
+        
         # Calculate total estimated punches from Pass 1
         total_estimated_punches = sum(emp.punch_count_estimate for emp in discovery_result.employees)
         
@@ -172,23 +193,7 @@ async def test_parallel_processing():
         
         print(f"\n📋 Detailed Employee Results:")
         for i, result in enumerate(employee_results, 1):
-            employee_id = result.employee_identifier
-            actual_punches = len(result.punch_events)
-            
-            # Find the corresponding estimated count
-            estimated_punches = next(
-                (emp.punch_count_estimate for emp in discovery_result.employees 
-                 if emp.employee_identifier_in_file == employee_id), 
-                0
-            )
-            
-            employee_accuracy = (actual_punches / estimated_punches * 100) if estimated_punches > 0 else 100
-            difference = actual_punches - estimated_punches
-            difference_sign = "+" if difference >= 0 else ""
-            
-            print(f"   {i:2d}. '{employee_id}':")
-            print(f"       Estimated: {estimated_punches} | Actual: {actual_punches} | "
-                  f"Diff: {difference_sign}{difference} | Accuracy: {employee_accuracy:.1f}%")
+            print(_format_employee_row(i, result, estimates))
         
         print("\n" + "=" * 60)
         print("🔧 STEP 3: RESULT STITCHING & VALIDATION")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Shared runner for the backend debug scripts
+
+Runs one or more debug scripts on a single event loop with a single
+keep-alive aiohttp session, so back-to-back runs reuse the loop, DNS
+lookups and TCP connections instead of setting them up per script.
+
+Usage:
+    python debug_harness.py                       # list available scripts
+    python debug_harness.py debug_api_upload_test
+    python debug_harness.py debug_march_27_date debug_actual_file_march_27
+
+Each debug script defines `async def main(session)` and can still be run
+directly (`python debug_api_upload_test.py`), which goes through run() here.
+Scripts buffer their report output per section with Section.
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Add backend to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+DEBUG_SCRIPTS = (
+    "debug_actual_file_march_27",
+    "debug_api_upload_test",
+    "debug_backend_date_serialization",
+    "debug_direct_llm_test",
+    "debug_march_27_date",
+    "debug_same_file_issues",
+)
+
+DebugMain = Callable[["aiohttp.ClientSession"], Awaitable[None]]
+
+# DEBUG_VERBOSE=0 skips the per-event and per-period listings, leaving the summaries
+VERBOSE = os.environ.get("DEBUG_VERBOSE", "1") == "1"
+
+
+class Section:
+    """
+    Collect a block of report lines and write them to stdout in one call.
+
+    Usage:
+        with Section() as p:
+            p("line 1")
+            p("line 2")
+
+    Lines gathered before an exception are still written on exit.
+    """
+
+    def __enter__(self) -> Callable[[str], None]:
+        self.lines = []
+        return self.lines.append
+
+    def __exit__(self, *exc_info) -> None:
+        if self.lines:
+            sys.stdout.write("\n".join(self.lines) + "\n")
+
+
+def create_session() -> "aiohttp.ClientSession":
+    """Create the keep-alive HTTP session shared by the debug scripts."""
+    # Imported here so scripts can use Section without aiohttp installed
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=10, keepalive_timeout=60, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def _run_all(mains: Iterable[DebugMain]) -> None:
+    """Run each entrypoint in turn with one shared session."""
+    async with create_session() as session:
+        for main in mains:
+            await main(session)
+
+
+def run(*mains: DebugMain) -> None:
+    """Run debug entrypoints on one event loop and one HTTP session."""
+    with asyncio.Runner() as runner:
+        runner.run(_run_all(mains))
+
+
+def load_main(script_name: str) -> DebugMain:
+    """Import a debug script by module name and return its main()."""
+    if script_name not in DEBUG_SCRIPTS:
+        raise ValueError(
+            f"Unknown debug script '{script_name}'. Available: {', '.join(DEBUG_SCRIPTS)}"
+        )
+    return importlib.import_module(script_name).main
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Available debug scripts:")
+        for name in DEBUG_SCRIPTS:
+            print(f"   - {name}")
+        sys.exit(0)
+
+    run(*(load_main(name) for name in sys.argv[1:]))
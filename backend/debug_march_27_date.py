@@ -3,62 +3,92 @@
 Debug script to investigate the March 27 vs March 26 date issue
 """
 
-import sys
 import asyncio
+import sys
 from datetime import datetime
 from pathlib import Path
 
 # Add backend to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app.core.llm_processing import parse_file_to_structured_data
+from app.core.llm_cache import cached_parse
+from debug_harness import Section
+
+# BB's identifiers look like 'BB - xxxxxxxxx / 649190 / Cashier'; a prefix check
+# rejects other employees on the first character instead of scanning the string
+BB_PREFIX = 'BB '
 
-# The specific CSV data showing the March 27 issue
-CSV_DATA_MARCH_27 = """
+# The specific CSV data showing the March 27 issue, kept as bytes since that is
+# what the parser takes
+CSV_DATA_MARCH_27 = b"""
 Employee / Job:,,,BB - xxxxxxxxx / 649190 / Cashier,,,,,,,,,,,,,,,,,,,,,,,,,,
 
 2490,,,3/27/2025,,9.00,,Thu,,,5:05 PM,,,,12:05 AM,,7.00,,63.00,,,0.00,,,0.00,,,63.00,,0.00
 """
 
+# One parse per process: every call to the debug function awaits the same task
+_parsed_task = None
+
+async def _get_parsed():
+    """Parse CSV_DATA_MARCH_27 once and hand the same result to every caller."""
+    global _parsed_task
+    if _parsed_task is None:
+        _parsed_task = asyncio.ensure_future(cached_parse(CSV_DATA_MARCH_27, "text/csv", "march27_test.csv"))
+    try:
+        # Shielded so a cancelled caller does not cancel the shared parse
+        return await asyncio.shield(_parsed_task)
+    except Exception:
+        # Let the next call retry instead of replaying the failure
+        _parsed_task = None
+        raise
+
 async def debug_march_27_parsing():
     """Debug the March 27 date parsing issue"""
-    print("🔍 DEBUGGING MARCH 27 DATE PARSING")
-    print("=" * 80)
+    with Section() as p:
+        p("🔍 DEBUGGING MARCH 27 DATE PARSING")
+        p("=" * 80)
     
-    print(f"\n📊 CSV INPUT:")
-    print("   Date: 3/27/2025 (Thursday)")
-    print("   Shift: 5:05 PM - 12:05 AM")
-    print("   Expected: March 27, 2025")
+        p(f"\n📊 CSV INPUT:")
+        p("   Date: 3/27/2025 (Thursday)")
+        p("   Shift: 5:05 PM - 12:05 AM")
+        p("   Expected: March 27, 2025")
     
     # Parse with LLM
-    result = await parse_file_to_structured_data(CSV_DATA_MARCH_27, "march27_test.csv", "march27_test.csv")
+    result = await _get_parsed()
     
-    print(f"\n🤖 LLM PARSING RESULT:")
-    print(f"   Found {len(result.punch_events)} punch events")
+    with Section() as p:
+        p(f"\n🤖 LLM PARSING RESULT:")
+        p(f"   Found {len(result.punch_events)} punch events")
     
-    for event in result.punch_events:
-        if 'BB' in event.employee_identifier_in_file:
-            print(f"\n   Employee: {event.employee_identifier_in_file}")
-            print(f"   Date parsed: {event.timestamp.date()} ({event.timestamp.strftime('%A')})")
-            print(f"   Time parsed: {event.timestamp.strftime('%I:%M %p')}")
-            print(f"   Punch type: {event.punch_type_as_parsed}")
-            print(f"   Full timestamp: {event.timestamp}")
+        for event in result.punch_events:
+            if event.employee_identifier_in_file.startswith(BB_PREFIX):
+                p(f"\n   Employee: {event.employee_identifier_in_file}")
+                p(f"   Date parsed: {event.timestamp.date()} ({event.timestamp.strftime('%A')})")
+                p(f"   Time parsed: {event.timestamp.strftime('%I:%M %p')}")
+                p(f"   Punch type: {event.punch_type_as_parsed}")
+                p(f"   Full timestamp: {event.timestamp}")
     
     # Test shift parsing
-    print(f"\n🔧 SHIFT PARSING TEST:")
-    from app.core.compliance_rules import parse_shifts_from_punch_events
+    with Section() as p:
+        p(f"\n🔧 SHIFT PARSING TEST:")
+        from app.core.compliance_rules import parse_shifts_from_punch_events
     
-    shifts_by_employee = parse_shifts_from_punch_events(result.punch_events)
+        shifts_by_employee = parse_shifts_from_punch_events(result.punch_events)
     
-    for employee_id, shifts in shifts_by_employee.items():
-        if 'BB' in employee_id:
-            print(f"\n   Employee: {employee_id}")
-            for i, shift in enumerate(shifts, 1):
-                print(f"   Shift {i}:")
-                print(f"     Shift date: {shift.shift_date} ({shift.shift_date.strftime('%A')})")
-                print(f"     Clock in: {shift.clock_in_time}")
-                print(f"     Clock out: {shift.clock_out_time}")
-                print(f"     Total hours: {shift.total_hours}")
+        for employee_id, shifts in shifts_by_employee.items():
+            if employee_id.startswith(BB_PREFIX):
+                p(f"\n   Employee: {employee_id}")
+                for i, shift in enumerate(shifts, 1):
+                    p(f"   Shift {i}:")
+                    p(f"     Shift date: {shift.shift_date} ({shift.shift_date.strftime('%A')})")
+                    p(f"     Clock in: {shift.clock_in_time}")
+                    p(f"     Clock out: {shift.clock_out_time}")
+                    p(f"     Total hours: {shift.total_hours}")
+
+async def main(session):
+    """Debug harness entrypoint; this script makes no HTTP calls."""
+    await debug_march_27_parsing()
 
 if __name__ == "__main__":
-    asyncio.run(debug_march_27_parsing()) 
\ No newline at end of file
+    from debug_harness import run
+    run(main) 
\ No newline at end of file
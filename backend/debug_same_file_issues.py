@@ -6,14 +6,32 @@ to understand why they're missing now and why the date is wrong.
 
 import sys
 import asyncio
+import mimetypes
+import aiofiles
 import aiohttp
-import json
+import orjson
 from pathlib import Path
 
 # Add backend to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-async def test_file_upload():
+from debug_harness import VERBOSE
+
+# Report polling: start fast, back off to a capped delay, give up after the timeout
+POLL_INITIAL_DELAY = 0.1
+POLL_MAX_DELAY = 2.0
+POLL_TIMEOUT = 120.0
+
+def bb_filter(items, key='employee_identifier'):
+    """Return the items whose identifier mentions BB, in one pass over the list."""
+    matches = []
+    append = matches.append
+    for item in items:
+        if 'BB' in str(item.get(key) or ''):
+            append(item)
+    return matches
+
+async def test_file_upload(session: aiohttp.ClientSession):
     """Test uploading the actual Excel file to see current behavior"""
     
     # The file path from the CSV screenshot
@@ -47,111 +65,130 @@ async def test_file_upload():
         # Test with local backend
         base_url = "http://localhost:8000"
         
-        async with aiohttp.ClientSession() as session:
-            # Step 1: Start analysis
-            print(f"\n🚀 STEP 1: Starting analysis...")
-            
-            with open(test_file_path, 'rb') as f:
-                file_data = aiohttp.FormData()
-                file_data.add_field('file', f, filename=test_file_path.name)
-                
-                async with session.post(f"{base_url}/api/start-analysis", data=file_data) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        print(f"❌ Start analysis failed: {response.status} - {error_text}")
-                        return
-                    
-                    start_result = await response.json()
-                    request_id = start_result.get('request_id')
-                    print(f"✅ Analysis started with request_id: {request_id}")
-            
-            # Step 2: Get analysis results
-            print(f"\n📊 STEP 2: Getting analysis results...")
-            
-            # Wait a bit for processing
-            await asyncio.sleep(5)
+        # Step 1: Start analysis
+        print(f"\n🚀 STEP 1: Starting analysis...")
+        
+        # Read the file once, off the event loop; the bytes can be re-sent as-is
+        async with aiofiles.open(test_file_path, 'rb') as f:
+            file_bytes = await f.read()
+        content_type = mimetypes.guess_type(test_file_path.name)[0] or 'application/octet-stream'
+        
+        file_data = aiohttp.FormData()
+        file_data.add_field('file', file_bytes, filename=test_file_path.name, content_type=content_type)
+        
+        async with session.post(f"{base_url}/api/start-analysis", data=file_data) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                print(f"❌ Start analysis failed: {response.status} - {error_text}")
+                return
             
-            async with session.get(f"{base_url}/api/analyze?request_id={request_id}") as response:
+            start_result = await response.json()
+            request_id = start_result.get('request_id')
+            print(f"✅ Analysis started with request_id: {request_id}")
+        
+        # Step 2: Get analysis results
+        print(f"\n📊 STEP 2: Getting analysis results...")
+        
+        # Poll the report with exponential backoff until it is no longer processing
+        delay = POLL_INITIAL_DELAY
+        deadline = asyncio.get_running_loop().time() + POLL_TIMEOUT
+        while True:
+            async with session.get(f"{base_url}/api/reports/{request_id}") as response:
                 if response.status != 200:
                     error_text = await response.text()
                     print(f"❌ Analysis failed: {response.status} - {error_text}")
                     return
                 
                 analysis_result = await response.json()
-                
-                print(f"✅ Analysis completed!")
-                print(f"📝 Status: {analysis_result.get('status')}")
-                
-                # Extract key information
-                violations = analysis_result.get('analysis_results', {}).get('violations', [])
-                daily_ot = analysis_result.get('analysis_results', {}).get('daily_overtime_violations', [])
-                weekly_ot = analysis_result.get('analysis_results', {}).get('weekly_overtime_violations', [])
-                
-                print(f"\n📊 VIOLATION SUMMARY:")
-                print(f"   Total violations: {len(violations)}")
-                print(f"   Daily overtime violations: {len(daily_ot)}")
-                print(f"   Weekly overtime violations: {len(weekly_ot)}")
-                
-                # Check dates in violations
-                print(f"\n📅 DATE ANALYSIS:")
-                dates_found = set()
-                for violation in violations:
-                    date_str = str(violation.get('date_of_violation', 'Unknown'))
-                    dates_found.add(date_str)
-                    print(f"   Violation date: {date_str}")
-                
-                print(f"   Unique dates: {list(dates_found)}")
-                
-                # Look for BB specifically
-                print(f"\n👤 BB EMPLOYEE ANALYSIS:")
-                bb_violations = [v for v in violations if 'BB' in str(v.get('employee_identifier', ''))]
-                bb_daily_ot = [v for v in daily_ot if 'BB' in str(v.get('employee_identifier', ''))]
-                bb_weekly_ot = [v for v in weekly_ot if 'BB' in str(v.get('employee_identifier', ''))]
-                
-                print(f"   BB total violations: {len(bb_violations)}")
-                print(f"   BB daily overtime: {len(bb_daily_ot)}")
-                print(f"   BB weekly overtime: {len(bb_weekly_ot)}")
-                
-                for violation in bb_violations:
-                    print(f"   BB Violation: {violation.get('rule_id')} on {violation.get('date_of_violation')}")
-                
-                # Look at shifts/punch events for BB
-                punch_events = analysis_result.get('analysis_results', {}).get('punch_events', [])
-                bb_punches = [p for p in punch_events if 'BB' in str(p.get('employee_identifier_in_file', ''))]
-                
-                print(f"\n🕐 BB PUNCH EVENTS:")
-                print(f"   Total BB punches: {len(bb_punches)}")
-                
-                for i, punch in enumerate(bb_punches, 1):
-                    timestamp = punch.get('timestamp', 'Unknown')
-                    punch_type = punch.get('punch_type_as_parsed', 'Unknown')
-                    print(f"   {i}. {punch_type}: {timestamp}")
-                
-                # Check for any overtime violations at all
-                print(f"\n⚡ OVERTIME VIOLATIONS DETAIL:")
-                all_ot_violations = daily_ot + weekly_ot
-                
-                if all_ot_violations:
-                    for ot_violation in all_ot_violations:
-                        print(f"   OT: {ot_violation.get('rule_id')} - {ot_violation.get('employee_identifier')} on {ot_violation.get('date_of_violation')}")
-                        print(f"       Details: {ot_violation.get('specific_details', 'No details')}")
-                else:
-                    print(f"   ❌ NO OVERTIME VIOLATIONS FOUND")
-                    print(f"   This suggests either:")
-                    print(f"   1. The shift parsing is incorrect")
-                    print(f"   2. The LLM is parsing times incorrectly")
-                    print(f"   3. The overtime detection logic has an issue")
-                
-                # Save full response for debugging
-                debug_file = Path(__file__).parent / "debug_api_response.json"
-                with open(debug_file, 'w') as f:
-                    json.dump(analysis_result, f, indent=2, default=str)
-                print(f"\n💾 Full response saved to: {debug_file}")
-                
+            
+            if analysis_result.get('status') != 'processing':
+                break
+            if asyncio.get_running_loop().time() + delay > deadline:
+                print(f"❌ Analysis still processing after {POLL_TIMEOUT:.0f}s")
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_DELAY)
+        
+        print(f"✅ Analysis completed!")
+        print(f"📝 Status: {analysis_result.get('status')}")
+        
+        # Extract key information
+        violations = analysis_result.get('analysis_results', {}).get('violations', [])
+        daily_ot = analysis_result.get('analysis_results', {}).get('daily_overtime_violations', [])
+        weekly_ot = analysis_result.get('analysis_results', {}).get('weekly_overtime_violations', [])
+        
+        print(f"\n📊 VIOLATION SUMMARY:")
+        print(f"   Total violations: {len(violations)}")
+        print(f"   Daily overtime violations: {len(daily_ot)}")
+        print(f"   Weekly overtime violations: {len(weekly_ot)}")
+        
+        # Check dates in violations
+        print(f"\n📅 DATE ANALYSIS:")
+        dates_found = set()
+        add_date = dates_found.add
+        for violation in violations:
+            date_str = str(violation.get('date_of_violation', 'Unknown'))
+            add_date(date_str)
+            if VERBOSE:
+                print(f"   Violation date: {date_str}")
+        
+        print(f"   Unique dates: {list(dates_found)}")
+        
+        # Look for BB specifically
+        print(f"\n👤 BB EMPLOYEE ANALYSIS:")
+        bb_violations = bb_filter(violations)
+        bb_daily_ot = bb_filter(daily_ot)
+        bb_weekly_ot = bb_filter(weekly_ot)
+        
+        print(f"   BB total violations: {len(bb_violations)}")
+        print(f"   BB daily overtime: {len(bb_daily_ot)}")
+        print(f"   BB weekly overtime: {len(bb_weekly_ot)}")
+        
+        for violation in bb_violations:
+            print(f"   BB Violation: {violation.get('rule_id')} on {violation.get('date_of_violation')}")
+        
+        # Look at shifts/punch events for BB
+        punch_events = analysis_result.get('analysis_results', {}).get('punch_events', [])
+        bb_punches = bb_filter(punch_events, key='employee_identifier_in_file')
+        
+        print(f"\n🕐 BB PUNCH EVENTS:")
+        print(f"   Total BB punches: {len(bb_punches)}")
+        
+        if VERBOSE:
+            for i, punch in enumerate(bb_punches, 1):
+                timestamp = punch.get('timestamp', 'Unknown')
+                punch_type = punch.get('punch_type_as_parsed', 'Unknown')
+                print(f"   {i}. {punch_type}: {timestamp}")
+        
+        # Check for any overtime violations at all
+        print(f"\n⚡ OVERTIME VIOLATIONS DETAIL:")
+        all_ot_violations = daily_ot + weekly_ot
+        
+        if all_ot_violations:
+            for ot_violation in all_ot_violations:
+                print(f"   OT: {ot_violation.get('rule_id')} - {ot_violation.get('employee_identifier')} on {ot_violation.get('date_of_violation')}")
+                print(f"       Details: {ot_violation.get('specific_details', 'No details')}")
+        else:
+            print(f"   ❌ NO OVERTIME VIOLATIONS FOUND")
+            print(f"   This suggests either:")
+            print(f"   1. The shift parsing is incorrect")
+            print(f"   2. The LLM is parsing times incorrectly")
+            print(f"   3. The overtime detection logic has an issue")
+        
+        # Save full response for debugging
+        debug_file = Path(__file__).parent / "debug_api_response.json"
+        debug_file.write_bytes(orjson.dumps(analysis_result, option=orjson.OPT_INDENT_2, default=str))
+        print(f"\n💾 Full response saved to: {debug_file}")
+            
     except Exception as e:
         print(f"❌ Error during testing: {str(e)}")
         import traceback
         traceback.print_exc()
 
+async def main(session):
+    """Debug harness entrypoint; start, polling and report calls share its keep-alive session."""
+    await test_file_upload(session)
+
 if __name__ == "__main__":
-    asyncio.run(test_file_upload()) 
\ No newline at end of file
+    from debug_harness import run
+    run(main) 
\ No newline at end of file
@@ -4,6 +4,7 @@ Debug script to track timestamps through the entire meal break calculation pipel
 to identify exactly where timezone conversion is still happening.
 """
 
+import re
 import sys
 import os
 import pytz
@@ -22,6 +23,22 @@ from app.core.compliance_rules import (
     _create_shift_summary_for_violation,
     _check_first_meal_break_violation
 )
+from debug_harness import Section, VERBOSE
+
+# Punch types that mark an explicit meal break
+_MEAL_EVENT_RE = re.compile(r'meal|lunch|break', re.IGNORECASE)
+
+def _fmt_time(dt, seconds=False):
+    """dt.strftime('%I:%M %p') (or '%I:%M:%S %p') without the strftime format parser."""
+    hour = (dt.hour - 1) % 12 + 1
+    meridiem = 'AM' if dt.hour < 12 else 'PM'
+    if seconds:
+        return f"{hour:02d}:{dt.minute:02d}:{dt.second:02d} {meridiem}"
+    return f"{hour:02d}:{dt.minute:02d} {meridiem}"
+
+def _fmt(dt):
+    """dt.strftime('%Y-%m-%d %I:%M:%S %p') without the strftime format parser."""
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {_fmt_time(dt, seconds=True)}"
 
 def debug_timezone_discrepancy():
     """Debug timezone discrepancy step by step through the pipeline"""
@@ -91,32 +108,31 @@ def debug_timezone_discrepancy():
     # Scenario 3: UTC timestamps that might get converted differently
     print("\n" + "=" * 80)
     print("📋 SCENARIO 3: UTC timestamps (might show timezone conversion issues)")
-    utc_tz = pytz.UTC
     test_events_utc = [
         LLMParsedPunchEvent(
             employee_identifier_in_file="Test Employee UTC",
-            timestamp=utc_tz.localize(datetime(2025, 3, 25, 8, 56)),  # 8:56 AM UTC = 12:56 AM Pacific (in March DST)
+            timestamp=datetime(2025, 3, 25, 8, 56, tzinfo=pytz.UTC),  # 8:56 AM UTC = 12:56 AM Pacific (in March DST)
             punch_type_as_parsed="Clock In",
             role_as_parsed="Cook",
             hourly_wage_as_parsed=18.00
         ),
         LLMParsedPunchEvent(
             employee_identifier_in_file="Test Employee UTC",
-            timestamp=utc_tz.localize(datetime(2025, 3, 25, 15, 28)),  # 3:28 PM UTC = 7:28 AM Pacific
+            timestamp=datetime(2025, 3, 25, 15, 28, tzinfo=pytz.UTC),  # 3:28 PM UTC = 7:28 AM Pacific
             punch_type_as_parsed="Meal Break Start",
             role_as_parsed="Cook",
             hourly_wage_as_parsed=18.00
         ),
         LLMParsedPunchEvent(
             employee_identifier_in_file="Test Employee UTC",
-            timestamp=utc_tz.localize(datetime(2025, 3, 25, 15, 58)),  # 3:58 PM UTC = 7:58 AM Pacific
+            timestamp=datetime(2025, 3, 25, 15, 58, tzinfo=pytz.UTC),  # 3:58 PM UTC = 7:58 AM Pacific
             punch_type_as_parsed="Meal Break End",
             role_as_parsed="Cook",
             hourly_wage_as_parsed=18.00
         ),
         LLMParsedPunchEvent(
             employee_identifier_in_file="Test Employee UTC",
-            timestamp=utc_tz.localize(datetime(2025, 3, 25, 18, 30)),  # 6:30 PM UTC = 10:30 AM Pacific
+            timestamp=datetime(2025, 3, 25, 18, 30, tzinfo=pytz.UTC),  # 6:30 PM UTC = 10:30 AM Pacific
             punch_type_as_parsed="Clock Out",
             role_as_parsed="Cook",
             hourly_wage_as_parsed=18.00
@@ -127,101 +143,107 @@ def debug_timezone_discrepancy():
 
 def debug_meal_break_pipeline(events, scenario_name):
     """Debug the meal break pipeline step by step"""
-    print(f"\n🔄 DEBUGGING {scenario_name.upper()} SCENARIO")
-    print("-" * 60)
+    with Section() as p:
+        p(f"\n🔄 DEBUGGING {scenario_name.upper()} SCENARIO")
+        p("-" * 60)
     
-    print(f"\n📝 STEP 1: Input Punch Events ({len(events)} events)")
-    for i, event in enumerate(events, 1):
-        tz_info = f" (TZ: {event.timestamp.tzinfo})" if event.timestamp.tzinfo else " (naive)"
-        print(f"   {i}. {event.punch_type_as_parsed}: {event.timestamp.isoformat()}{tz_info}")
-        print(f"      Formatted: {event.timestamp.strftime('%Y-%m-%d %I:%M:%S %p')}")
+        p(f"\n📝 STEP 1: Input Punch Events ({len(events)} events)")
+        if VERBOSE:
+            for i, event in enumerate(events, 1):
+                ts = event.timestamp
+                tz = ts.tzinfo
+                tz_info = f" (TZ: {tz})" if tz else " (naive)"
+                p(f"   {i}. {event.punch_type_as_parsed}: {ts.isoformat()}{tz_info}")
+                p(f"      Formatted: {_fmt(ts)}")
     
-    # Step 2: Parse into shifts
-    print(f"\n🔄 STEP 2: Parsing into shifts...")
-    shifts_by_employee = parse_shifts_from_punch_events(events)
+        # Step 2: Parse into shifts
+        p(f"\n🔄 STEP 2: Parsing into shifts...")
+        shifts_by_employee = parse_shifts_from_punch_events(events)
     
-    for employee_id, shifts in shifts_by_employee.items():
-        print(f"\n👤 Employee: {employee_id}")
-        for shift_idx, shift in enumerate(shifts):
-            print(f"\n   📅 Shift {shift_idx + 1}:")
-            print(f"      Date: {shift.shift_date}")
+        for employee_id, shifts in shifts_by_employee.items():
+            p(f"\n👤 Employee: {employee_id}")
+            for shift_idx, shift in enumerate(shifts):
+                p(f"\n   📅 Shift {shift_idx + 1}:")
+                p(f"      Date: {shift.shift_date}")
             
-            # Debug shift analysis - call analyze_shift manually and track changes
-            print(f"\n   🔍 BEFORE analyze_shift():")
-            print(f"      - Raw punch events: {len(shift.punch_events)}")
-            for i, event in enumerate(shift.punch_events):
-                tz_info = f" (TZ: {event.timestamp.tzinfo})" if event.timestamp.tzinfo else " (naive)"
-                print(f"        {i+1}. {event.punch_type_as_parsed}: {event.timestamp.isoformat()}{tz_info}")
+                # Debug shift analysis - call analyze_shift manually and track changes
+                p(f"\n   🔍 BEFORE analyze_shift():")
+                p(f"      - Raw punch events: {len(shift.punch_events)}")
+                if VERBOSE:
+                    for i, event in enumerate(shift.punch_events, 1):
+                        ts = event.timestamp
+                        tz = ts.tzinfo
+                        tz_info = f" (TZ: {tz})" if tz else " (naive)"
+                        p(f"        {i}. {event.punch_type_as_parsed}: {ts.isoformat()}{tz_info}")
             
-            # Call analyze_shift to process the events
-            shift.analyze_shift()
+                # Call analyze_shift to process the events
+                shift.analyze_shift()
             
-            print(f"\n   🔍 AFTER analyze_shift():")
-            print(f"      - Clock In: {shift.clock_in_time.isoformat() if shift.clock_in_time else 'None'}")
-            if shift.clock_in_time:
-                tz_info = f" (TZ: {shift.clock_in_time.tzinfo})" if shift.clock_in_time.tzinfo else " (naive)"
-                print(f"        Formatted: {shift.clock_in_time.strftime('%Y-%m-%d %I:%M:%S %p')}{tz_info}")
+                p(f"\n   🔍 AFTER analyze_shift():")
+                p(f"      - Clock In: {shift.clock_in_time.isoformat() if shift.clock_in_time else 'None'}")
+                if shift.clock_in_time:
+                    tz_info = f" (TZ: {shift.clock_in_time.tzinfo})" if shift.clock_in_time.tzinfo else " (naive)"
+                    p(f"        Formatted: {_fmt(shift.clock_in_time)}{tz_info}")
                 
-            print(f"      - Clock Out: {shift.clock_out_time.isoformat() if shift.clock_out_time else 'None'}")
-            if shift.clock_out_time:
-                tz_info = f" (TZ: {shift.clock_out_time.tzinfo})" if shift.clock_out_time.tzinfo else " (naive)"
-                print(f"        Formatted: {shift.clock_out_time.strftime('%Y-%m-%d %I:%M:%S %p')}{tz_info}")
+                p(f"      - Clock Out: {shift.clock_out_time.isoformat() if shift.clock_out_time else 'None'}")
+                if shift.clock_out_time:
+                    tz_info = f" (TZ: {shift.clock_out_time.tzinfo})" if shift.clock_out_time.tzinfo else " (naive)"
+                    p(f"        Formatted: {_fmt(shift.clock_out_time)}{tz_info}")
             
-            print(f"      - Total Hours: {shift.total_hours_worked:.2f}")
+                p(f"      - Total Hours: {shift.total_hours_worked:.2f}")
             
-            # Add detailed debug info about work periods
-            print(f"      - Work Periods: {len(shift.continuous_work_periods) if hasattr(shift, 'continuous_work_periods') else 'N/A'}")
-            if hasattr(shift, 'continuous_work_periods'):
-                for i, (start, end) in enumerate(shift.continuous_work_periods, 1):
-                    duration = (end - start).total_seconds() / 3600
-                    print(f"        Period {i}: {start.strftime('%I:%M %p')} to {end.strftime('%I:%M %p')} ({duration:.2f} hours)")
+                # Add detailed debug info about work periods
+                p(f"      - Work Periods: {len(shift.continuous_work_periods) if hasattr(shift, 'continuous_work_periods') else 'N/A'}")
+                if hasattr(shift, 'continuous_work_periods'):
+                    if VERBOSE:
+                        for i, (start, end) in enumerate(shift.continuous_work_periods, 1):
+                            duration = (end - start).total_seconds() / 3600
+                            p(f"        Period {i}: {_fmt_time(start)} to {_fmt_time(end)} ({duration:.2f} hours)")
             
-            print(f"      - Meal Breaks: {len(shift.meal_breaks)}")
+                p(f"      - Meal Breaks: {len(shift.meal_breaks)}")
             
-            for i, (start, end) in enumerate(shift.meal_breaks, 1):
-                duration = (end - start).total_seconds() / 60
-                start_tz = f" (TZ: {start.tzinfo})" if start.tzinfo else " (naive)"
-                end_tz = f" (TZ: {end.tzinfo})" if end.tzinfo else " (naive)"
-                print(f"        Break {i}: {start.isoformat()}{start_tz} to {end.isoformat()}{end_tz}")
-                print(f"                 Formatted: {start.strftime('%I:%M:%S %p')} to {end.strftime('%I:%M:%S %p')} ({duration:.0f} min)")
+                if VERBOSE:
+                    for i, (start, end) in enumerate(shift.meal_breaks, 1):
+                        duration = (end - start).total_seconds() / 60
+                        start_tz = f" (TZ: {start.tzinfo})" if start.tzinfo else " (naive)"
+                        end_tz = f" (TZ: {end.tzinfo})" if end.tzinfo else " (naive)"
+                        p(f"        Break {i}: {start.isoformat()}{start_tz} to {end.isoformat()}{end_tz}")
+                        p(f"                 Formatted: {_fmt_time(start, seconds=True)} to {_fmt_time(end, seconds=True)} ({duration:.0f} min)")
                 
-            # Check for meal break event detection
-            has_meal_events = any(
-                any(keyword in event.punch_type_as_parsed.lower() for keyword in ['meal', 'lunch', 'break'])
-                for event in shift.punch_events
-            )
-            print(f"      - Has explicit meal break events: {has_meal_events}")
+                # Check for meal break event detection
+                has_meal_events = any(_MEAL_EVENT_RE.search(event.punch_type_as_parsed) for event in shift.punch_events)
+                p(f"      - Has explicit meal break events: {has_meal_events}")
     
-    # Step 3: Detect violations and track timestamp handling
-    print(f"\n🚨 STEP 3: Detecting violations...")
-    violations = detect_meal_break_violations(events)
+        # Step 3: Detect violations and track timestamp handling
+        p(f"\n🚨 STEP 3: Detecting violations...")
+        violations = detect_meal_break_violations(events)
     
-    print(f"Found {len(violations)} violations:")
-    for violation in violations:
-        print(f"\n❌ VIOLATION: {violation.rule_id}")
-        print(f"   📝 Details: {violation.specific_details}")
+        p(f"Found {len(violations)} violations:")
+        for violation in violations:
+            p(f"\n❌ VIOLATION: {violation.rule_id}")
+            p(f"   📝 Details: {violation.specific_details}")
         
-        print(f"\n   🕐 Related Punch Events:")
-        if violation.related_punch_events:
-            for punch in violation.related_punch_events:
-                print(f"      - Timestamp: {punch['timestamp']}")
-                print(f"        Formatted: {punch['formatted_time']}")
-                print(f"        Type: {punch['punch_type']}")
+            p(f"\n   🕐 Related Punch Events:")
+            if violation.related_punch_events:
+                for punch in violation.related_punch_events:
+                    p(f"      - Timestamp: {punch['timestamp']}")
+                    p(f"        Formatted: {punch['formatted_time']}")
+                    p(f"        Type: {punch['punch_type']}")
         
-        print(f"\n   📊 Shift Summary:")
-        if violation.shift_summary:
-            summary = violation.shift_summary
-            print(f"      - Clock In: {summary.get('clock_in_time', 'N/A')}")
-            print(f"        Formatted: {summary.get('clock_in_formatted', 'N/A')}")
-            print(f"      - Clock Out: {summary.get('clock_out_time', 'N/A')}")
-            print(f"        Formatted: {summary.get('clock_out_formatted', 'N/A')}")
-            print(f"      - Total Hours: {summary.get('total_hours_worked', 0):.2f}")
-            print(f"      - Meal Breaks: {summary.get('meal_break_count', 0)}")
+            p(f"\n   📊 Shift Summary:")
+            if violation.shift_summary:
+                summary = violation.shift_summary
+                p(f"      - Clock In: {summary.get('clock_in_time', 'N/A')}")
+                p(f"        Formatted: {summary.get('clock_in_formatted', 'N/A')}")
+                p(f"      - Clock Out: {summary.get('clock_out_time', 'N/A')}")
+                p(f"        Formatted: {summary.get('clock_out_formatted', 'N/A')}")
+                p(f"      - Total Hours: {summary.get('total_hours_worked', 0):.2f}")
+                p(f"      - Meal Breaks: {summary.get('meal_break_count', 0)}")
             
-            if summary.get('meal_breaks'):
-                for i, meal_break in enumerate(summary['meal_breaks'], 1):
-                    print(f"        Break {i}: {meal_break['start_time']} to {meal_break['end_time']}")
-                    print(f"                 Formatted: {meal_break['start_formatted']} to {meal_break['end_formatted']}")
+                if summary.get('meal_breaks'):
+                    for i, meal_break in enumerate(summary['meal_breaks'], 1):
+                        p(f"        Break {i}: {meal_break['start_time']} to {meal_break['end_time']}")
+                        p(f"                 Formatted: {meal_break['start_formatted']} to {meal_break['end_formatted']}")
 
 if __name__ == "__main__":
     debug_timezone_discrepancy() 
\ No newline at end of file
@@ -1,3 +1,4 @@
 # llm_utils package
-from .openai_utils import get_openai_chat_response
-from .google_utils import get_google_gemini_response 
\ No newline at end of file
+from .openai_utils import get_openai_chat_response, aget_openai_chat_response
+from .google_utils import get_google_gemini_response, aget_google_gemini_response, aget_google_gemini_response_stream, ajoin_gemini_stream, aget_google_gemini_batch, gather_prompts
+from .errors import LLMError, LLMAuthError, LLMRateLimitError, LLMBlockedError, LLMAPIError, raise_for_error
@@ -0,0 +1,76 @@
+"""
+Micro-batching of concurrent LLM prompts
+
+BatchedDispatcher collects prompts submitted within a short window (or until
+max_batch are waiting) and hands them to one send_batch coroutine call, so a
+burst of requests costs one round-trip instead of one per request. Each
+caller awaits its own future and gets back only its own answer.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple, Union
+
+BATCH_WINDOW_MS = 25
+MAX_BATCH = 8
+
+# send_batch returns one entry per prompt, in order; an exception entry fails only that caller
+SendBatch = Callable[[List[str]], Awaitable[List[Union[str, BaseException]]]]
+
+
+class BatchedDispatcher:
+    """Queue prompts and dispatch them to send_batch in batches."""
+
+    def __init__(self, send_batch: SendBatch, window_ms: float = BATCH_WINDOW_MS, max_batch: int = MAX_BATCH):
+        self.send_batch = send_batch
+        self.window_seconds = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight = set()  # strong refs so in-flight dispatch tasks are not collected
+
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt and wait for its answer."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # First use on this event loop (scripts may run several loops in turn)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect())
+        future = loop.create_future()
+        self._queue.put_nowait((prompt, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window_seconds
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch in the background so the next window fills while this batch is in flight
+            task = loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            results = await self.send_batch([prompt for prompt, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"send_batch returned {len(results)} results for {len(batch)} prompts")
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():  # caller gave up (cancelled) while the batch was in flight
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
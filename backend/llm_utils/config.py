@@ -0,0 +1,31 @@
+"""
+Model configuration shared by the llm_utils modules
+
+config.json (next to the llm_utils package) is parsed once per process; the
+Google and OpenAI helpers read their settings from MODEL_CONFIG. A missing or
+malformed file yields an empty config, so every lookup falls back to the
+defaults at its call site.
+"""
+
+import functools
+import json
+import os
+from typing import Any, Dict
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+
+
+@functools.lru_cache(maxsize=1)
+def load_config() -> Dict[str, Any]:
+    """Parse config.json once; returns {} if it is missing or invalid."""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Warning: {CONFIG_PATH} not found. Using default model names.")
+    except json.JSONDecodeError:
+        print(f"Warning: Error decoding {CONFIG_PATH}. Using default model names.")
+    return {}
+
+
+MODEL_CONFIG = load_config()
@@ -0,0 +1,78 @@
+"""
+Typed errors for LLM helper results
+
+The request-level helpers (get_google_gemini_response, get_openai_chat_response,
+the function-calling helpers, ...) report failures as strings starting with
+one of ERROR_PREFIXES, which existing callers check for. Concurrent callers
+that fan out with asyncio.gather(..., return_exceptions=True) need failures
+as exceptions instead: error_from_message() turns such a string into the
+matching LLMError subclass, and raise_for_error() raises it.
+"""
+
+import re
+from typing import Optional, TypeVar
+
+# Exact prefixes of the error strings the helpers return (or yield as a stream's last chunk);
+# kept specific so an answer that merely starts with "Error" is not mistaken for a failure
+ERROR_PREFIXES = (
+    "Error: ",
+    "Error decoding or appending non-image file content: ",
+    "Google API Error (",
+    "An unexpected error occurred (",
+    "An unexpected error occurred with OpenAI: ",
+    "OpenAI API Connection Error: ",
+    "OpenAI API Rate Limit Exceeded: ",
+    "OpenAI API Authentication Error: ",
+    "OpenAI API Error: ",
+)
+
+
+class LLMError(Exception):
+    """An LLM call failed; the message is the helper's error string."""
+
+
+class LLMAuthError(LLMError):
+    """API key missing, invalid or without permission."""
+
+
+class LLMRateLimitError(LLMError):
+    """Quota or rate limit exhausted (HTTP 429); worth retrying later."""
+
+
+class LLMBlockedError(LLMError):
+    """Prompt or response blocked by safety filters."""
+
+
+class LLMAPIError(LLMError):
+    """Any other API or client-side failure."""
+
+
+# Checked in order; the first category whose pattern matches wins. Rate limits come first
+# because quota messages often name the API key or project they apply to.
+_CATEGORY_PATTERNS = (
+    (LLMRateLimitError, re.compile(r"quota|rate[ _]limit|resource[ _]?exhausted|\b429\b", re.IGNORECASE)),
+    (LLMAuthError, re.compile(
+        r"api[ _]key|permission[ _]?denied|authentication|unauthori[sz]ed|not configured", re.IGNORECASE)),
+    (LLMBlockedError, re.compile(r"blocked|safety", re.IGNORECASE)),
+)
+
+
+def error_from_message(message: str) -> Optional[LLMError]:
+    """Return the typed error for a helper error string, or None if message is a normal answer."""
+    if not isinstance(message, str) or not message.startswith(ERROR_PREFIXES):
+        return None
+    for error_class, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(message):
+            return error_class(message)
+    return LLMAPIError(message)
+
+
+Result = TypeVar("Result")
+
+
+def raise_for_error(result: Result) -> Result:
+    """Return result unchanged unless it is a helper error string, in which case raise its LLMError."""
+    error = error_from_message(result) if isinstance(result, str) else None
+    if error is not None:
+        raise error
+    return result
@@ -3,245 +3,780 @@
 import os
 import json
 import time # For retry logic
-from typing import List, Dict, Any, Union, Optional # For type hinting
+from typing import List, Dict, Any, Union, Optional, AsyncIterator, Tuple # For type hinting
 import asyncio
+import functools
+import importlib.util
+import itertools
+import logging
+import random
+import re
+import threading
 
+import httpx
 from google.genai import Client
 from google.genai import types as genai_types
 from google.genai import errors as genai_errors
 
+from . import response_cache
+from .config import MODEL_CONFIG
+from .errors import ERROR_PREFIXES, LLMAPIError, LLMError, error_from_message
+from .batching import BatchedDispatcher, MAX_BATCH
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
 print(f"DEBUG: Loaded google.genai Client from: {Client.__module__ if hasattr(Client, '__module__') else 'Not available'}")
 
+# --- Async HTTP Configuration ---
+# client.aio calls share one pooled HTTP client for the life of the process. Over httpx
+# that pool defaults to 100 connections with a 5s keep-alive, so raise both; when aiohttp
+# is installed the SDK uses it instead, with an unlimited connector, and these args
+# (which would be passed to aiohttp per request) must be left unset. With h2 installed
+# (httpx[http2] in requirements) concurrent calls are also multiplexed over HTTP/2.
+ASYNC_MAX_CONNECTIONS = 512
+ASYNC_KEEPALIVE_SECONDS = 75.0
+
+def _async_http_options() -> Optional[genai_types.HttpOptions]:
+    if importlib.util.find_spec("aiohttp") is not None:
+        return None
+    return genai_types.HttpOptions(async_client_args={
+        "limits": httpx.Limits(
+            max_connections=ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=ASYNC_MAX_CONNECTIONS,
+            keepalive_expiry=ASYNC_KEEPALIVE_SECONDS
+        ),
+        "http2": importlib.util.find_spec("h2") is not None
+    })
+
 # --- API Key Configuration ---
-API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-print(f"DEBUG: API_KEY loaded - Length: {len(API_KEY) if API_KEY else 'None'}, Full value: {repr(API_KEY)}")
-if API_KEY:
+# The key is read once at import; call reload_keys() after changing the environment (e.g. load_dotenv)
+def _create_client(api_key: Optional[str]) -> Optional[Client]:
+    if not api_key:
+        print("Warning (google_utils): GOOGLE_API_KEY or GEMINI_API_KEY not found. LLM calls will fail.")
+        return None
     try:
-        # Create client instance with API key
-        client = Client(api_key=API_KEY)
+        # Create the one client instance every call (sync and client.aio) goes through
+        new_client = Client(api_key=api_key, http_options=_async_http_options())
         print("Google GenAI SDK client created successfully.")
+        return new_client
     except Exception as e:
         print(f"Error creating Google GenAI SDK client: {e}. LLM calls may fail.")
-        client = None
-else:
-    print("Warning (google_utils): GOOGLE_API_KEY or GEMINI_API_KEY not found. LLM calls will fail.")
-    client = None
-
-# Load model configuration
-CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
-MODEL_CONFIG = {"google": {"default_model": "gemini-1.5-flash-latest", "vision_model": "gemini-1.5-flash-latest"}}
-try:
-    with open(CONFIG_PATH, 'r') as f:
-        MODEL_CONFIG = json.load(f)
-except FileNotFoundError:
-    print(f"Warning: {CONFIG_PATH} not found. Using default Google model names.")
-except json.JSONDecodeError:
-    print(f"Warning: Error decoding {CONFIG_PATH}. Using default Google model names.")
+        return None
+
+def _pooled_api_keys() -> List[str]:
+    """Keys from GOOGLE_API_KEYS ("k1,k2,..."), one per project quota to spread calls over."""
+    return [key.strip() for key in os.getenv("GOOGLE_API_KEYS", "").split(",") if key.strip()]
+
+def _primary_api_key() -> Optional[str]:
+    return os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY") or next(iter(_pooled_api_keys()), None)
+
+API_KEY = _primary_api_key()
+print(f"DEBUG: API_KEY loaded - Length: {len(API_KEY) if API_KEY else 'None'}, Full value: {repr(API_KEY)}")
+client = _create_client(API_KEY)
+
+def reload_keys() -> None:
+    """Re-read the API keys; rebuilds the client if the primary key changed and the key pool on next use."""
+    global API_KEY, client, _extra_clients
+    api_key = _primary_api_key()
+    if api_key != API_KEY:
+        API_KEY = api_key
+        client = _create_client(api_key)
+    _extra_clients = None
 
 GOOGLE_DEFAULT_MODEL = MODEL_CONFIG.get("google", {}).get("default_model", "gemini-1.5-flash-latest")
 # GOOGLE_VISION_MODEL is kept for the existing function, but the new function gives more control
 GOOGLE_VISION_MODEL = MODEL_CONFIG.get("google", {}).get("vision_model", "gemini-1.5-flash-latest") 
 
-def get_google_gemini_response(prompt: str, file_content: bytes = None, filename: str = None, mime_type: str = None):
+# API paths ("models/<name>") for every configured Google model, built once at import
+_MODEL_PATHS = {
+    name: name if name.startswith("models/") else f"models/{name}"
+    for name in (*MODEL_CONFIG.get("google", {}).values(), GOOGLE_DEFAULT_MODEL, GOOGLE_VISION_MODEL)
+    if isinstance(name, str)
+}
+_DEFAULT_MODEL_PATH = _MODEL_PATHS[GOOGLE_DEFAULT_MODEL]
+
+def _model_path(model_name: str) -> str:
+    """API path for a model name; client.models.generate_content expects the "models/" prefix."""
+    return _MODEL_PATHS.get(model_name) or (model_name if model_name.startswith("models/") else f"models/{model_name}")
+
+# --- Rate Limiting and Retry Backoff ---
+# Every generate_content call goes through one process-wide bucket that caps calls in
+# flight. Pacing is off unless google.rate_limit.requests_per_minute is configured, since
+# the right rate is the project's real quota; once set, parallel per-employee calls and
+# their retries take tokens from the bucket (up to `burst` at once) and 429s slow it down
+# until calls succeed again.
+_RATE_LIMIT_CONFIG = MODEL_CONFIG.get("google", {}).get("rate_limit", {})
+
+def _new_rate_limiter() -> TokenBucket:
+    requests_per_minute = _RATE_LIMIT_CONFIG.get("requests_per_minute")
+    return TokenBucket(
+        rate=requests_per_minute / 60 if requests_per_minute else None,
+        capacity=_RATE_LIMIT_CONFIG.get("burst", 50),
+        max_concurrency=_RATE_LIMIT_CONFIG.get("max_concurrency", 50)
+    )
+
+_RATE_LIMITER = _new_rate_limiter()
+
+# --- API Key Pool ---
+# With several keys in GOOGLE_API_KEYS, generate calls rotate over the primary client and one
+# extra client per additional key, each behind its own rate limiter, so throughput scales with
+# the number of project quotas. A retry takes the next key, so a 429 on one project fails over.
+_extra_clients: Optional[List[Tuple[Client, TokenBucket]]] = None
+_extra_clients_lock = threading.Lock()
+_round_robin = itertools.count()
+
+def _get_extra_clients() -> List[Tuple[Client, TokenBucket]]:
+    global _extra_clients
+    if _extra_clients is None:
+        with _extra_clients_lock:
+            if _extra_clients is None:
+                extras = []
+                for key in dict.fromkeys(_pooled_api_keys()):
+                    extra_client = _create_client(key) if key != API_KEY else None
+                    if extra_client:
+                        extras.append((extra_client, _new_rate_limiter()))
+                _extra_clients = extras
+    return _extra_clients
+
+def _next_client(contents: Optional[List[Any]] = None) -> Tuple[Client, TokenBucket]:
     """
-    Gets a response from Google Gemini API using the google.genai SDK.
-    Handles text prompts and optional file uploads (images, text).
-    This function is kept for simpler, non-function-calling use cases.
-    It uses google.genai.Client().
+    Client and rate limiter for the next generate call, round-robin over the key pool.
+    Requests referencing a Files API upload stay on the primary client: files belong to the uploading project.
     """
-    if not client:
-        return "Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created."
+    extras = _get_extra_clients() if client else []
+    if not extras or any(isinstance(part, genai_types.File) for part in contents or ()):
+        return client, _RATE_LIMITER
+    index = next(_round_robin) % (len(extras) + 1)
+    return (client, _RATE_LIMITER) if index == 0 else extras[index - 1]
+
+MAX_BACKOFF_SECONDS = 30.0
+_backoff_random = random.Random()  # seeded once from system entropy
+
+# Per-request timeouts (seconds): plain text calls are short, function calls return whole punch lists
+_TIMEOUT_CONFIG = MODEL_CONFIG.get("google", {}).get("timeouts", {})
+REQUEST_TIMEOUT_SECONDS = _TIMEOUT_CONFIG.get("request_seconds", 30)
+FUNCTION_CALL_TIMEOUT_SECONDS = _TIMEOUT_CONFIG.get("function_call_seconds", 120)
+SIMPLE_MAX_RETRIES = 3
+# Longest server-requested retry delay (RetryInfo / Retry-After) that is honored as-is
+MAX_SERVER_RETRY_DELAY_SECONDS = 60.0
+
+def _backoff_seconds(initial_backoff_seconds: float, attempt: int) -> float:
+    """
+    Full-jitter exponential backoff: uniform over [0, min(cap, base * 2**attempt)].
+    Every retry loop draws from _backoff_random; replace it with a seeded random.Random for reproducible delays.
+    """
+    return _backoff_random.uniform(0, min(MAX_BACKOFF_SECONDS, initial_backoff_seconds * (2 ** attempt)))
 
+def _server_retry_delay(e: Exception) -> Optional[float]:
+    """Delay the server asked for: google.rpc.RetryInfo.retryDelay ("23s") or a Retry-After header."""
+    details = getattr(e, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details") or []:
+            delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+            if isinstance(delay, str) and delay.endswith("s"):
+                try:
+                    return float(delay[:-1])
+                except ValueError:
+                    pass
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    retry_after = headers.get("retry-after") if headers is not None else None
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except ValueError:  # HTTP-date form; fall back to our own backoff
+        return None
+
+def _retry_delay(e: Exception, initial_backoff_seconds: float, attempt: int) -> float:
+    """Wait before retrying after e: the server's requested delay if given, else full-jitter backoff."""
+    server_delay = _server_retry_delay(e)
+    if server_delay is not None:
+        return min(server_delay, MAX_SERVER_RETRY_DELAY_SECONDS)
+    return _backoff_seconds(initial_backoff_seconds, attempt)
+
+def _is_retryable_simple_error(e: Exception) -> bool:
+    """Transient failures of the simple helpers: rate limits, 5xx and request timeouts."""
+    if isinstance(e, httpx.TimeoutException):
+        return True
+    if isinstance(e, genai_errors.ServerError) or getattr(e, "code", None) == 429:
+        return True
+    return isinstance(e, genai_errors.APIError) and bool(_RETRYABLE_RE.search(f"{e.__class__.__name__} {e}"))
+
+def _log_retry(attempt: int, max_retries: int, delay: float, e: Exception) -> None:
+    logger.warning(
+        "Gemini call failed, retrying: attempt=%s/%s delay=%.2fs error_type=%s code=%s",
+        attempt, max_retries, delay, e.__class__.__name__, getattr(e, "code", None)
+    )
+
+# Non-image uploads are appended to the prompt as text, truncated to this many characters.
+# A UTF-8 character is at most 4 bytes, so that many characters never need more than FILE_TEXT_MAX_BYTES.
+FILE_TEXT_MAX_CHARS = 50000
+FILE_TEXT_MAX_BYTES = 4 * FILE_TEXT_MAX_CHARS
+
+# Decoding time grows with output length, so plain text answers are capped at this many tokens
+DEFAULT_MAX_OUTPUT_TOKENS = 2048
+
+@functools.lru_cache(maxsize=32)
+def _simple_generate_config(max_output_tokens: int, stop_sequences: Optional[tuple] = None) -> genai_types.GenerateContentConfig:
+    """Memoized GenerateContentConfig for the simple text helpers."""
+    return genai_types.GenerateContentConfig(
+        max_output_tokens=max_output_tokens,
+        stop_sequences=list(stop_sequences) if stop_sequences else None,
+        http_options=genai_types.HttpOptions(timeout=int(REQUEST_TIMEOUT_SECONDS * 1000))
+    )
+
+def _simple_cache_options(max_output_tokens: int, stop_sequences: Optional[List[str]]) -> Dict[str, Any]:
+    """Generation options that change the answer and therefore belong in the cache key."""
+    return {"max_output_tokens": max_output_tokens, "stop_sequences": stop_sequences or []}
+
+def _build_simple_request(prompt: str, file_content: bytes = None, filename: str = None, mime_type: str = None):
+    """
+    Build (model_name, contents) for get_google_gemini_response and its async twin.
+    file_content is raw bytes or a File returned by aupload_file.
+    Returns an error string instead if a non-image file cannot be decoded.
+    """
     model_name_to_use = GOOGLE_DEFAULT_MODEL
-    contents_for_sdk = []
 
     # Prepare content based on input
     # This simple version assumes prompt is always text, and file_content might be image or appended text.
     # The new function will handle more complex `prompt_parts`.
     text_part_of_prompt = prompt
 
+    if isinstance(file_content, genai_types.File):
+        # Already uploaded through the Files API (see aupload_file); reference it by handle
+        return GOOGLE_VISION_MODEL, [text_part_of_prompt, file_content]
     if file_content and mime_type:
         if 'image' in mime_type.lower():
             model_name_to_use = GOOGLE_VISION_MODEL # Ensure this model is appropriate
             # For multi-part prompts (text + image), structure as a list of parts.
             # The google.genai SDK can take dicts for parts.
             image_data_dict = {"mime_type": mime_type, "data": file_content}
-            contents_for_sdk = [text_part_of_prompt, image_data_dict]
+            return model_name_to_use, [text_part_of_prompt, image_data_dict]
         else: # Treat as text to append
             try:
-                file_text_content = file_content.decode(errors='ignore')
-                text_part_of_prompt = f"{prompt}\\n\\n--- User Uploaded File: {filename or 'unknown'} (MIME type: {mime_type}) ---\\n{file_text_content[:50000]}\\n--- End of File Content ---"
-                contents_for_sdk = [text_part_of_prompt]
+                # Only the head of the file reaches the prompt, so only the head is decoded,
+                # straight from the upload's buffer (a memoryview slice copies nothing)
+                file_text_content = str(memoryview(file_content)[:FILE_TEXT_MAX_BYTES], 'utf-8', 'ignore')[:FILE_TEXT_MAX_CHARS]
+                text_part_of_prompt = f"{prompt}\\n\\n--- User Uploaded File: {filename or 'unknown'} (MIME type: {mime_type}) ---\\n{file_text_content}\\n--- End of File Content ---"
             except Exception as e:
                 return f"Error decoding or appending non-image file content: {e}"
-    else:
-        contents_for_sdk = [text_part_of_prompt]
+    return model_name_to_use, [text_part_of_prompt]
+
+def _simple_response_text(response) -> str:
+    """Return the response text, or an "Error:" string if it was blocked or empty."""
+    if response.prompt_feedback and response.prompt_feedback.block_reason:
+        return (f"Error: Google API blocked the prompt. Reason: {response.prompt_feedback.block_reason.name}. "
+                f"Safety ratings: {response.prompt_feedback.safety_ratings if hasattr(response.prompt_feedback, 'safety_ratings') else 'N/A'}")
+    
+    # The .text accessor on GenerateContentResponse is the primary way to get simple text.
+    if not response.text:
+        if response.candidates:
+            for candidate in response.candidates:
+                # Check if a candidate was blocked or stopped for unusual reasons
+                if candidate.finish_reason not in [genai_types.Candidate.FinishReason.STOP, genai_types.Candidate.FinishReason.MAX_TOKENS]:
+                    if candidate.safety_ratings:
+                        for rating in candidate.safety_ratings:
+                            # More robust check for harmful content
+                            if rating.probability not in [genai_types.HarmProbability.NEGLIGIBLE, genai_types.HarmProbability.LOW]:
+                                return (f"Error: Google API response potentially blocked due to safety. "
+                                        f"Category: {rating.category.name}, Probability: {rating.probability.name}")
+        return "Error: Received an empty text response from Google Gemini. The prompt might have been blocked or resulted in no usable content."
+
+    if response.candidates and response.candidates[0].finish_reason == genai_types.Candidate.FinishReason.MAX_TOKENS:
+        logger.warning("Gemini response was cut off at max_output_tokens.")
+    return response.text
+
+# One pass over "<ErrorClassName> <message>" picks the hint for a simple-helper API error
+_SIMPLE_ERROR_RE = re.compile(
+    r"(?P<auth>api[ _]key[ _]not[ _]valid|api_key_invalid|permission[ _]?denied|unauthori[sz]ed)"
+    r"|(?P<not_found>not[ _]?found|could not find)"
+    r"|(?P<quota>quota|resource[ _]?exhausted)"
+    r"|(?P<invalid_argument>invalid[ _]?argument)",
+    re.IGNORECASE
+)
+_SIMPLE_ERROR_HINTS = {
+    "auth": " This may indicate an issue with your GOOGLE_API_KEY (invalid, disabled, or missing permissions).",
+    "not_found": " The requested resource (e.g., model 'models/{model}') might not be found.",
+    "quota": " You may have exceeded your API quota (Rate Limit).",
+    "invalid_argument": " Invalid argument provided to the API: {error}",
+}
+
+def _simple_api_error_message(e: genai_errors.APIError, model_name_to_use: str) -> str:
+    error_message = f"Google API Error ({e.__class__.__name__}): {str(e)}."
+    match = _SIMPLE_ERROR_RE.search(f"{e.__class__.__name__} {e}")
+    if match:
+        error_message += _SIMPLE_ERROR_HINTS[match.lastgroup].format(model=model_name_to_use, error=e)
+    return error_message
+
+# Images above this size are uploaded through the Files API instead of being sent inline as base64
+INLINE_MAX_BYTES = 2 * 1024 * 1024
+
+async def aupload_file(file_obj, mime_type: str) -> genai_types.File:
+    """Upload a file-like object (e.g. a spooled request upload) through the Files API."""
+    if not client:
+        raise RuntimeError("GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created.")
+    return await client.aio.files.upload(file=file_obj, config={"mime_type": mime_type})
+
+# Embedding model for the semantic cache layer (response_cache.SEMANTIC_CACHE_ENABLED)
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+def _embed_prompt(prompt: str):
+    """Normalized embedding of a prompt for semantic cache lookups; None if embedding fails."""
+    try:
+        result = client.models.embed_content(model=EMBEDDING_MODEL, contents=prompt)
+        return response_cache.normalize(result.embeddings[0].values)
+    except Exception as e:
+        logger.warning("Could not embed prompt for semantic cache: %s", e)
+        return None
+
+async def _aembed_prompt(prompt: str):
+    """Async version of _embed_prompt."""
+    try:
+        result = await client.aio.models.embed_content(model=EMBEDDING_MODEL, contents=prompt)
+        return response_cache.normalize(result.embeddings[0].values)
+    except Exception as e:
+        logger.warning("Could not embed prompt for semantic cache: %s", e)
+        return None
+
+def get_google_gemini_response(prompt: str, file_content: bytes = None, filename: str = None, mime_type: str = None,
+                               max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS, stop_sequences: Optional[List[str]] = None):
+    """
+    Gets a response from Google Gemini API using the google.genai SDK.
+    Handles text prompts and optional file uploads (images, text).
+    This function is kept for simpler, non-function-calling use cases.
+    It uses google.genai.Client().
+    The answer is capped at max_output_tokens; generation also stops at any of stop_sequences.
+    """
+    if not client:
+        return "Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created."
+
+    request = _build_simple_request(prompt, file_content, filename, mime_type)
+    if isinstance(request, str):
+        return request
+    model_name_to_use, contents_for_sdk = request
 
     try:
         # Use client.models.generate_content instead of genai.GenerativeModel
-        model_path = f"models/{model_name_to_use}" if not model_name_to_use.startswith("models/") else model_name_to_use
-        response = client.models.generate_content(
-            model=model_path,
-            contents=contents_for_sdk
+        model_path = _model_path(model_name_to_use)
+        generate_config = _simple_generate_config(max_output_tokens, tuple(stop_sequences) if stop_sequences else None)
+        cache_key, cached = response_cache.lookup(
+            model_path, contents_for_sdk, options=_simple_cache_options(max_output_tokens, stop_sequences)
         )
-
-        if response.prompt_feedback and response.prompt_feedback.block_reason:
-            return (f"Error: Google API blocked the prompt. Reason: {response.prompt_feedback.block_reason.name}. "
-                    f"Safety ratings: {response.prompt_feedback.safety_ratings if hasattr(response.prompt_feedback, 'safety_ratings') else 'N/A'}")
-        
-        # The .text accessor on GenerateContentResponse is the primary way to get simple text.
-        if not response.text:
-            if response.candidates:
-                for candidate in response.candidates:
-                    # Check if a candidate was blocked or stopped for unusual reasons
-                    if candidate.finish_reason not in [genai_types.Candidate.FinishReason.STOP, genai_types.Candidate.FinishReason.MAX_TOKENS]:
-                        if candidate.safety_ratings:
-                            for rating in candidate.safety_ratings:
-                                # More robust check for harmful content
-                                if rating.probability not in [genai_types.HarmProbability.NEGLIGIBLE, genai_types.HarmProbability.LOW]:
-                                    return (f"Error: Google API response potentially blocked due to safety. "
-                                            f"Category: {rating.category.name}, Probability: {rating.probability.name}")
-            return "Error: Received an empty text response from Google Gemini. The prompt might have been blocked or resulted in no usable content."
-
-        return response.text
+        if cached is not None:
+            logger.info("Returning cached Gemini response for %s", model_path)
+            return cached
+        # Paraphrase matching only applies to bare prompts; with a file attached the answer depends on the file
+        prompt_vector = None
+        if response_cache.SEMANTIC_CACHE_ENABLED and cache_key is not None and not file_content:
+            prompt_vector = _embed_prompt(prompt)
+            cached = response_cache.semantic_lookup(model_path, prompt_vector) if prompt_vector else None
+            if cached is not None:
+                logger.info("Returning semantically cached Gemini response for %s", model_path)
+                return cached
+        text = _generate_text(model_path, contents_for_sdk, generate_config)
+        if not text.startswith("Error:"):
+            response_cache.store(cache_key, text)
+            response_cache.store_embedding(cache_key, model_path, prompt_vector)
+        return text
 
     except genai_errors.APIError as e: # Base class for most API errors
-        error_message_str = str(e).lower()
-        error_message = f"Google API Error ({e.__class__.__name__}): {str(e)}."
-        if "api key not valid" in error_message_str or "permissiondenied" in e.__class__.__name__.lower():
-            error_message += " This may indicate an issue with your GOOGLE_API_KEY (invalid, disabled, or missing permissions)."
-        elif "notfound" in e.__class__.__name__.lower():
-            error_message += f" The requested resource (e.g., model 'models/{model_name_to_use}') might not be found."
-        elif "resourceexhausted" in e.__class__.__name__.lower() or "quota" in error_message_str:
-             error_message += " You may have exceeded your API quota (Rate Limit)."
-        elif "invalidargument" in e.__class__.__name__.lower(): 
-            error_message += f" Invalid argument provided to the API: {e}"
-        return error_message
+        return _simple_api_error_message(e, model_name_to_use)
     except Exception as e:
         return f"An unexpected error occurred (google_utils.get_google_gemini_response): {str(e)} (Type: {e.__class__.__name__})"
 
+def _generate_text(model_path: str, contents_for_sdk: List[Any], generate_config: genai_types.GenerateContentConfig) -> str:
+    """
+    Rate-limited generate_content call for the simple helpers, retried on transient failures.
+    Returns the text or an "Error:" string; raises the last error once retries are exhausted.
+    """
+    for attempt in range(SIMPLE_MAX_RETRIES + 1):
+        try:
+            api_client, limiter = _next_client(contents_for_sdk)
+            with limiter:
+                response = api_client.models.generate_content(
+                    model=model_path,
+                    contents=contents_for_sdk,
+                    config=generate_config
+                )
+            return _simple_response_text(response)
+        except (genai_errors.APIError, httpx.TimeoutException) as e:
+            if attempt == SIMPLE_MAX_RETRIES or not _is_retryable_simple_error(e):
+                raise
+            delay = _retry_delay(e, 1.0, attempt)
+            _log_retry(attempt + 1, SIMPLE_MAX_RETRIES, delay, e)
+            time.sleep(delay)
 
-def get_gemini_response_with_function_calling(
-    prompt_parts: List[Union[str, Dict[str, Any]]], # Can take dicts for parts, SDK handles conversion
-    tools: Optional[List[Dict[str, Any]]] = None, # Tools as list of dicts, SDK handles conversion
-    model_name_override: Optional[str] = None,
-    max_retries: int = 3,
-    initial_backoff_seconds: float = 1.0,
-    temperature: Optional[float] = None
-) -> Union[Dict[str, Any], str]:
+async def _agenerate_text(model_path: str, contents_for_sdk: List[Any], generate_config: genai_types.GenerateContentConfig) -> str:
+    """Async version of _generate_text."""
+    for attempt in range(SIMPLE_MAX_RETRIES + 1):
+        try:
+            api_client, limiter = _next_client(contents_for_sdk)
+            async with limiter:
+                response = await api_client.aio.models.generate_content(
+                    model=model_path,
+                    contents=contents_for_sdk,
+                    config=generate_config
+                )
+            return _simple_response_text(response)
+        except (genai_errors.APIError, httpx.TimeoutException) as e:
+            if attempt == SIMPLE_MAX_RETRIES or not _is_retryable_simple_error(e):
+                raise
+            delay = _retry_delay(e, 1.0, attempt)
+            _log_retry(attempt + 1, SIMPLE_MAX_RETRIES, delay, e)
+            await asyncio.sleep(delay)
+
+async def aget_google_gemini_response(prompt: str, file_content: bytes = None, filename: str = None, mime_type: str = None,
+                                      max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS, stop_sequences: Optional[List[str]] = None):
     """
-    Gets a response from Google Gemini API, supporting multi-modal input, function calling, and retries.
-    Uses client.models.generate_content for API interaction.
+    Async version of get_google_gemini_response for use inside request handlers.
+    Awaits client.aio so the event loop keeps serving other requests during the call.
+    With the semantic cache on, the prompt is embedded while the exact-match lookup runs, and
+    Gemini is only called when neither cache layer has an answer.
+    """
+    if not client:
+        return "Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created."
 
-    Args:
-        prompt_parts: A list of content parts for the prompt (strings or dicts for file data).
-        tools: An optional list of tool definitions (as dictionaries matching SDK structure).
-        model_name_override: Optional model name to use (e.g., 'gemini-1.5-pro-latest').
-        max_retries: Maximum number of retries for retryable errors.
-        initial_backoff_seconds: Initial backoff time for retries.
-        temperature: Optional temperature parameter for controlling randomness (0.0 for deterministic).
+    request = _build_simple_request(prompt, file_content, filename, mime_type)
+    if isinstance(request, str):
+        return request
+    model_name_to_use, contents_for_sdk = request
 
-    Returns:
-        A dictionary with function call arguments if a function is called by the LLM.
-        A string with the LLM's text response if no function call is made.
-        A string prefixed with "Error:" if an unrecoverable error occurs or retries are exhausted.
+    try:
+        model_path = _model_path(model_name_to_use)
+        generate_config = _simple_generate_config(max_output_tokens, tuple(stop_sequences) if stop_sequences else None)
+        # Paraphrase matching only applies to bare prompts; with a file attached the answer depends on the file.
+        # The embedding overlaps the exact-match lookup; the paid generate call waits for both cache layers.
+        embed_task = None
+        if response_cache.SEMANTIC_CACHE_ENABLED and response_cache.CACHE_ENABLED and not file_content:
+            embed_task = asyncio.create_task(_aembed_prompt(prompt))
+        try:
+            cache_key, cached = await response_cache.alookup(
+                model_path, contents_for_sdk, options=_simple_cache_options(max_output_tokens, stop_sequences)
+            )
+            if cached is not None:
+                logger.info("Returning cached Gemini response for %s", model_path)
+                return cached
+
+            prompt_vector = None
+            if embed_task is not None and cache_key is not None:
+                prompt_vector = await embed_task
+                cached = await response_cache.asemantic_lookup(model_path, prompt_vector) if prompt_vector else None
+                if cached is not None:
+                    logger.info("Returning semantically cached Gemini response for %s", model_path)
+                    return cached
+        finally:
+            if embed_task is not None and not embed_task.done():
+                embed_task.cancel()
+
+        if PROMPT_BATCHING and not file_content and not stop_sequences and max_output_tokens == DEFAULT_MAX_OUTPUT_TOKENS:
+            # Text-only prompts with default options may share one API call with other concurrent requests
+            text = await _prompt_dispatcher.submit(prompt)
+        else:
+            text = await _agenerate_text(model_path, contents_for_sdk, generate_config)
+        if not text.startswith("Error:"):
+            await response_cache.astore(cache_key, text)
+            await response_cache.astore_embedding(cache_key, model_path, prompt_vector)
+        return text
+
+    except genai_errors.APIError as e: # Base class for most API errors
+        return _simple_api_error_message(e, model_name_to_use)
+    except Exception as e:
+        return f"An unexpected error occurred (google_utils.aget_google_gemini_response): {str(e)} (Type: {e.__class__.__name__})"
+
+async def gather_prompts(prompts: List[str], **kwargs) -> List[Union[str, LLMError]]:
+    """
+    Answer several prompts concurrently with aget_google_gemini_response, in order.
+    kwargs are passed to every call. A failed prompt yields an LLMError (LLMRateLimitError,
+    LLMAuthError, ...) in place of its answer, so callers can partition results by isinstance.
+    """
+    results = await asyncio.gather(
+        *(aget_google_gemini_response(prompt, **kwargs) for prompt in prompts),
+        return_exceptions=True
+    )
+    return [_as_result_or_error(result) for result in results]
+
+def _as_result_or_error(result: Union[str, BaseException]) -> Union[str, LLMError]:
+    """Map one gathered result to its text or a typed LLMError."""
+    if isinstance(result, genai_errors.APIError):
+        result = _simple_api_error_message(result, GOOGLE_DEFAULT_MODEL)
+    elif isinstance(result, LLMError):
+        return result
+    elif isinstance(result, BaseException):
+        return LLMAPIError(f"An unexpected error occurred: {result} (Type: {result.__class__.__name__})")
+    return error_from_message(result) or result
+
+async def aget_google_gemini_response_stream(prompt: str, file_content: bytes = None, filename: str = None, mime_type: str = None,
+                                             max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS,
+                                             stop_sequences: Optional[List[str]] = None) -> AsyncIterator[str]:
+    """
+    Streaming version of aget_google_gemini_response: yields text chunks as Gemini produces them.
+    Failures are yielded as a single chunk prefixed with "Error:" (or "Google API Error"), matching the
+    error strings of the non-streaming helpers. The full text is cached once the stream completes.
+    """
+    if not client:
+        yield "Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created."
+        return
+
+    request = _build_simple_request(prompt, file_content, filename, mime_type)
+    if isinstance(request, str):
+        yield request
+        return
+    model_name_to_use, contents_for_sdk = request
+
+    model_path = _model_path(model_name_to_use)
+    generate_config = _simple_generate_config(max_output_tokens, tuple(stop_sequences) if stop_sequences else None)
+    cache_key, cached = await response_cache.alookup(
+        model_path, contents_for_sdk, options=_simple_cache_options(max_output_tokens, stop_sequences)
+    )
+    if cached is not None:
+        logger.info("Returning cached Gemini response for %s", model_path)
+        yield cached
+        return
+
+    chunks = []
+    try:
+        api_client, limiter = _next_client(contents_for_sdk)
+        # The concurrency slot covers the whole stream, not just opening it: the response is still
+        # being generated while chunks are read. It is released when the stream ends or is closed.
+        async with limiter:
+            stream = await api_client.aio.models.generate_content_stream(
+                model=model_path,
+                contents=contents_for_sdk,
+                config=generate_config
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+    except genai_errors.APIError as e:
+        yield _simple_api_error_message(e, model_name_to_use)
+        return
+    except Exception as e:
+        yield f"An unexpected error occurred (google_utils.aget_google_gemini_response_stream): {str(e)} (Type: {e.__class__.__name__})"
+        return
+
+    if chunks:
+        await response_cache.astore(cache_key, "".join(chunks))
+    else:
+        yield "Error: Received an empty text response from Google Gemini. The prompt might have been blocked or resulted in no usable content."
+
+
+async def ajoin_gemini_stream(chunks: AsyncIterator[str]) -> str:
+    """
+    Collect aget_google_gemini_response_stream output into one string for callers that need it whole.
+    An error chunk is returned on its own in place of the partial text.
+    """
+    parts = []
+    async for chunk in chunks:
+        if chunk.startswith(ERROR_PREFIXES):
+            return chunk
+        parts.append(chunk)
+    return "".join(parts)
+
+# --- Prompt Batching ---
+# Opt-in (GEMINI_PROMPT_BATCHING=1): concurrent text-only prompts from aget_google_gemini_response
+# are sent as one numbered request and the JSON array answer is split back per caller.
+PROMPT_BATCHING = os.getenv("GEMINI_PROMPT_BATCHING", "0") == "1"
+BATCH_SYSTEM_INSTRUCTION = (
+    "You will receive several independent questions, each introduced by a '### Q<n>:' header. "
+    "Answer each one as if it were asked on its own. Return a JSON array of strings with exactly "
+    "one element per question, in order: element n is the full answer to Q<n>."
+)
+
+async def _agenerate_single_prompt(prompt: str) -> str:
+    return await _agenerate_text(_DEFAULT_MODEL_PATH, [prompt], _simple_generate_config(DEFAULT_MAX_OUTPUT_TOKENS))
+
+async def _send_prompt_batch(prompts: List[str]) -> List[Union[str, BaseException]]:
+    """Answer a batch of prompts with one call, falling back to one call each if the reply can't be split."""
+    if len(prompts) == 1:
+        return [await _agenerate_single_prompt(prompts[0])]
+
+    model_path = _DEFAULT_MODEL_PATH
+    combined = "\n".join(f"### Q{i}:\n{prompt}" for i, prompt in enumerate(prompts, 1))
+    try:
+        api_client, limiter = _next_client()
+        async with limiter:
+            response = await api_client.aio.models.generate_content(
+                model=model_path,
+                contents=[combined],
+                config=genai_types.GenerateContentConfig(
+                    system_instruction=BATCH_SYSTEM_INSTRUCTION,
+                    response_mime_type="application/json",
+                    # Each batched answer keeps the single-prompt budget
+                    max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS * len(prompts),
+                    http_options=genai_types.HttpOptions(timeout=int(REQUEST_TIMEOUT_SECONDS * 1000))
+                )
+            )
+        answers = json.loads(response.text or "")
+        if (isinstance(answers, list) and len(answers) == len(prompts)
+                and all(isinstance(answer, str) and answer for answer in answers)):
+            return answers
+        logger.warning("Batched reply did not match %d prompts; answering individually.", len(prompts))
+    except (genai_errors.APIError, json.JSONDecodeError) as e:
+        logger.warning("Batched call failed (%s); answering individually.", e.__class__.__name__)
+    return await asyncio.gather(*(_agenerate_single_prompt(prompt) for prompt in prompts), return_exceptions=True)
+
+_prompt_dispatcher = BatchedDispatcher(_send_prompt_batch)
+
+async def aget_google_gemini_batch(prompts: List[str], batch_size: int = MAX_BATCH) -> List[Union[str, LLMError]]:
+    """
+    Answer many independent text prompts, packing up to batch_size of them into each request.
+    Batches are sent concurrently; answers come back in prompt order, with an LLMError
+    (as from gather_prompts) for prompts that failed.
     """
+    if not client:
+        return [error_from_message("Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created.")] * len(prompts)
+    batches = [prompts[i:i + batch_size] for i in range(0, len(prompts), batch_size)]
+    results = await asyncio.gather(*(_send_prompt_batch(batch) for batch in batches), return_exceptions=True)
+
+    answers = []
+    for batch, result in zip(batches, results):
+        if isinstance(result, BaseException):
+            result = [result] * len(batch)
+        answers.extend(_as_result_or_error(answer) for answer in result)
+    return answers
+
+@functools.lru_cache(maxsize=32)
+def _build_tools(tools_json: str) -> List[genai_types.Tool]:
+    """Convert canonical tool JSON to SDK Tool objects; tool schemas are static, so this runs once per schema."""
+    return [
+        genai_types.Tool(function_declarations=[genai_types.FunctionDeclaration(
+            name=tool_dict["name"],
+            description=tool_dict["description"],
+            parameters=tool_dict["parameters"]
+        )])
+        for tool_dict in json.loads(tools_json)
+    ]
+
+@functools.lru_cache(maxsize=32)
+def _build_generate_config(
+    tools_json: Optional[str],
+    temperature: Optional[float],
+    max_output_tokens: Optional[int] = None
+) -> genai_types.GenerateContentConfig:
+    """Memoized GenerateContentConfig for the function-calling helpers."""
+    config_kwargs = {}
+    if tools_json:
+        config_kwargs["tools"] = _build_tools(tools_json)
+    if temperature is not None:
+        config_kwargs["temperature"] = temperature
+    if max_output_tokens is not None:
+        config_kwargs["max_output_tokens"] = max_output_tokens
+    # A hung request surfaces as a timeout and goes through the retry loop instead of blocking forever
+    config_kwargs["http_options"] = genai_types.HttpOptions(timeout=int(FUNCTION_CALL_TIMEOUT_SECONDS * 1000))
+    return genai_types.GenerateContentConfig(**config_kwargs)
+
+# APIError classification for the retry loops. Each pattern is matched case-insensitively
+# against "<ErrorClassName> <message>", so class names and message phrases share one search.
+_BAD_REQUEST_RE = re.compile(r"400|bad request", re.IGNORECASE)
+_BLOCKED_RE = re.compile(r"prompt was blocked|blockedprompt", re.IGNORECASE)
+_INVALID_ARGUMENT_RE = re.compile(r"invalid argument|invalidargument", re.IGNORECASE)
+_PERMISSION_RE = re.compile(r"permissiondenied|api key not valid", re.IGNORECASE)
+_NOT_FOUND_RE = re.compile(r"notfound", re.IGNORECASE)
+_RETRYABLE_RE = re.compile(
+    r"quota|resource exhausted|rate limit|service unavailable|deadline exceeded|internal server error",
+    re.IGNORECASE
+)
+
+def _log_prompt_cache_usage(response) -> None:
+    """Log how much of the prompt Gemini served from its implicit prefix cache."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    cached_tokens = usage.cached_content_token_count or 0
+    logger.debug("Prompt tokens: %s, served from prefix cache: %s", usage.prompt_token_count, cached_tokens)
+
+
+def _function_calling_once(
+    prompt_parts: List[Union[str, Dict[str, Any]]],
+    tools: Optional[List[Dict[str, Any]]],
+    model_name_override: Optional[str],
+    max_retries: int,
+    initial_backoff_seconds: float,
+    temperature: Optional[float],
+    max_output_tokens: Optional[int] = None
+) -> Union[Dict[str, Any], str]:
+    """One model's attempt (with retries) for get_gemini_response_with_function_calling."""
     if not client:
         return "Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created."
 
     model_to_use_str = model_name_override or GOOGLE_DEFAULT_MODEL
     
-    # Prepend "models/" if not already present for client.generate_content model path
-    if not model_to_use_str.startswith("models/"):
-        model_path_for_api = f"models/{model_to_use_str}"
-    else:
-        model_path_for_api = model_to_use_str
+    model_path_for_api = _model_path(model_to_use_str)
 
     if "flash" not in model_to_use_str and "pro" not in model_to_use_str and "standard" not in model_to_use_str:
-        print(f"Warning (google_utils): Model '{model_to_use_str}' might not fully support advanced function calling or all multimodal features. Consider models like 'gemini-1.5-flash-latest' or 'gemini-1.5-pro-latest'.")
+        logger.warning("Model '%s' might not fully support advanced function calling or all multimodal features. Consider models like 'gemini-1.5-flash-latest' or 'gemini-1.5-pro-latest'.", model_to_use_str)
+
+    # Tool declarations precede the contents in the request, so a fixed order keeps that prefix cacheable
+    if tools:
+        tools = sorted(tools, key=lambda tool: tool["name"])
+
+    cache_key, cached = response_cache.lookup(
+        model_path_for_api, prompt_parts, tools, temperature,
+        options={"max_output_tokens": max_output_tokens} if max_output_tokens is not None else None
+    )
+    if cached is not None:
+        logger.info("Returning cached Gemini response for %s", model_path_for_api)
+        return cached
 
     current_retry = 0
     while current_retry <= max_retries:
         try:
-            print(f"[DEBUG] Starting API call attempt {current_retry + 1}/{max_retries + 1}")
-            print(f"[INFO] Using Gemini model: {model_to_use_str} (API path: {model_path_for_api})")
+            logger.debug("Starting API call attempt %s/%s", current_retry + 1, max_retries + 1)
+            logger.info("Using Gemini model: %s (API path: %s)", model_to_use_str, model_path_for_api)
             
-            # Use client.models.generate_content instead of genai.GenerativeModel
-            # Tools need to be passed through config parameter
-            config = None
-            if tools:
-                print(f"[DEBUG] Converting {len(tools)} tool(s) to proper format...")
-                # Convert tool dictionaries to proper Tool objects with FunctionDeclaration
-                converted_tools = []
-                for i, tool_dict in enumerate(tools):
-                    print(f"[DEBUG] Converting tool {i + 1}: {tool_dict.get('name', 'unnamed')}")
-                    # Create FunctionDeclaration from the dictionary format
-                    func_decl = genai_types.FunctionDeclaration(
-                        name=tool_dict["name"],
-                        description=tool_dict["description"],
-                        parameters=tool_dict["parameters"]
-                    )
-                    # Create Tool with the FunctionDeclaration
-                    tool = genai_types.Tool(function_declarations=[func_decl])
-                    converted_tools.append(tool)
-                    print(f"[DEBUG] Tool {i + 1} converted successfully")
-                
-                print(f"[DEBUG] Creating GenerateContentConfig with {len(converted_tools)} tools...")
-                config_kwargs = {"tools": converted_tools}
-                if temperature is not None:
-                    config_kwargs["temperature"] = temperature
-                    print(f"[DEBUG] Setting temperature to {temperature}")
-                config = genai_types.GenerateContentConfig(**config_kwargs)
-                print(f"[DEBUG] Config created successfully")
-            else:
-                print(f"[DEBUG] No tools provided, creating config for temperature if needed")
-                if temperature is not None:
-                    config = genai_types.GenerateContentConfig(temperature=temperature)
-                    print(f"[DEBUG] Created config with temperature {temperature}")
-                else:
-                    config = None
-                    print(f"[DEBUG] Config will be None")
+            # Tools and temperature go through the config; both are built once per distinct schema
+            config = _build_generate_config(json.dumps(tools, sort_keys=True) if tools else None, temperature, max_output_tokens)
+            logger.debug("Config: %s tool(s), temperature %s", len(tools) if tools else 0, temperature)
             
-            print(f"[DEBUG] About to call client.models.generate_content with model: {model_path_for_api}")
-            print(f"[DEBUG] Prompt parts count: {len(prompt_parts)}")
-            print(f"[DEBUG] Config: {'Present' if config else 'None'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("About to call client.models.generate_content with model: %s", model_path_for_api)
+                logger.debug("Prompt parts count: %s", len(prompt_parts))
+                logger.debug("Config: %s", 'Present' if config else 'None')
             
-            response = client.models.generate_content(
-                model=model_path_for_api,
-                contents=prompt_parts,
-                config=config
-            )
+            api_client, limiter = _next_client(prompt_parts)
+            with limiter:
+                response = api_client.models.generate_content(
+                    model=model_path_for_api,
+                    contents=prompt_parts,
+                    config=config
+                )
             
-            print(f"[DEBUG] API call completed successfully")
-            print(f"[DEBUG] Response type: {type(response)}")
-            print(f"[DEBUG] Has candidates: {bool(response.candidates)}")
-            print(f"[DEBUG] Has prompt_feedback: {bool(response.prompt_feedback)}")
+            logger.debug("API call completed successfully")
+            _log_prompt_cache_usage(response)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Response type: %s", type(response))
+                logger.debug("Has candidates: %s", bool(response.candidates))
+                logger.debug("Has prompt_feedback: %s", bool(response.prompt_feedback))
 
             if response.prompt_feedback and response.prompt_feedback.block_reason:
-                print(f"[DEBUG] Prompt was blocked: {response.prompt_feedback.block_reason}")
+                logger.debug("Prompt was blocked: %s", response.prompt_feedback.block_reason)
                 return (f"Error: Prompt was blocked by Google API. Reason: {response.prompt_feedback.block_reason.name}. "
                         f"Safety ratings: {response.prompt_feedback.safety_ratings if hasattr(response.prompt_feedback, 'safety_ratings') else 'N/A'}")
 
-            print(f"[DEBUG] Checking for function calls in response...")
+            logger.debug("Checking for function calls in response...")
             # Check for function call in the first valid candidate
             if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
-                print(f"[DEBUG] Found {len(response.candidates[0].content.parts)} parts in response")
+                logger.debug("Found %s parts in response", len(response.candidates[0].content.parts))
                 for i, part in enumerate(response.candidates[0].content.parts):
-                    print(f"[DEBUG] Part {i + 1}: has function_call = {hasattr(part, 'function_call') and part.function_call}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Part %s: has function_call = %s", i + 1, hasattr(part, 'function_call') and part.function_call)
                     if part.function_call:
-                        print(f"[DEBUG] Function call found! Returning arguments...")
-                        return dict(part.function_call.args)
+                        logger.debug("Function call found! Returning arguments...")
+                        function_args = dict(part.function_call.args)
+                        response_cache.store(cache_key, function_args)
+                        return function_args
             
-            print(f"[DEBUG] No function call found, checking for text response...")
+            logger.debug("No function call found, checking for text response...")
             if response.text:
-                print(f"[DEBUG] Text response found: {len(response.text)} characters")
+                logger.debug("Text response found: %s characters", len(response.text))
+                response_cache.store(cache_key, response.text)
                 return response.text
             
-            print(f"[DEBUG] No text response, checking candidates for errors...")
+            logger.debug("No text response, checking candidates for errors...")
             # If no text and no function call, inspect candidates further
             if response.candidates:
                 candidate = response.candidates[0]
-                print(f"[DEBUG] Candidate finish_reason: {candidate.finish_reason}")
+                logger.debug("Candidate finish_reason: %s", candidate.finish_reason)
                 
                 # Check specifically for MALFORMED_FUNCTION_CALL
                 if hasattr(candidate.finish_reason, 'name'):
@@ -249,11 +784,11 @@ def get_gemini_response_with_function_calling(
                 else:
                     finish_reason_name = str(candidate.finish_reason)
                 
-                print(f"[DEBUG] Finish reason name: {finish_reason_name}")
+                logger.debug("Finish reason name: %s", finish_reason_name)
                 
                 # Handle MALFORMED_FUNCTION_CALL specifically
                 if "MALFORMED_FUNCTION_CALL" in finish_reason_name:
-                    print(f"[DEBUG] Detected MALFORMED_FUNCTION_CALL - data too complex")
+                    logger.debug("Detected MALFORMED_FUNCTION_CALL - data too complex")
                     return "Error: MALFORMED_FUNCTION_CALL - The input data is too complex for the AI model to process reliably. Please try with a smaller or simpler file."
                 
                 # Handle other non-success finish reasons
@@ -261,20 +796,20 @@ def get_gemini_response_with_function_calling(
                     detailed_error_msg = f"Error: LLM response was empty or incomplete. Finish Reason: {finish_reason_name}."
                     if candidate.safety_ratings:
                          detailed_error_msg += f" Safety Ratings: {[(sr.category.name, sr.probability.name) for sr in candidate.safety_ratings]}."
-                    print(f"[DEBUG] Candidate error: {detailed_error_msg}")
+                    logger.debug("Candidate error: %s", detailed_error_msg)
                     return detailed_error_msg
-                print(f"[DEBUG] Candidate finished normally but with empty response")
+                logger.debug("Candidate finished normally but with empty response")
                 return "" # Valid empty response (e.g. STOP with no text/FC)
             
-            print(f"[DEBUG] No candidates found in response")
+            logger.debug("No candidates found in response")
             return "Error: Received an empty response with no candidates from Google Gemini."
 
         except genai_errors.APIError as e: # Catch all Google API errors
             error_type = e.__class__.__name__
-            error_message_str = str(e).lower()
+            error_text = f"{error_type} {e}"
             
             # Add detailed logging for 400 errors to understand what's wrong
-            if "400" in str(e) or "bad request" in error_message_str:
+            if _BAD_REQUEST_RE.search(error_text):
                 print(f"[ERROR] 400 Bad Request details:")
                 print(f"[ERROR] Full error: {str(e)}")
                 print(f"[ERROR] Error type: {error_type}")
@@ -286,31 +821,24 @@ def get_gemini_response_with_function_calling(
                 return f"Error: Google API 400 Bad Request: {str(e)}"
 
             # Check for non-retryable conditions first based on message content or specific error types if they were available
-            if "prompt was blocked" in error_message_str or "blockedprompt" in error_type.lower():
+            if _BLOCKED_RE.search(error_text):
                 # This also handles cases where response.prompt_feedback.block_reason might have been caught as APIError
                 return f"Error: Google API blocked the prompt: {e}"
             # Add other specific non-retryable error string checks if needed, e.g., for invalid_argument before general retry.
-            if "invalid argument" in error_message_str or "invalidargument" in error_type.lower():
+            if _INVALID_ARGUMENT_RE.search(error_text):
                 return f"Google API Error (InvalidArgumentError likely): {str(e)}. Invalid argument provided."
-            if "permissiondenied" in error_type.lower() or "api key not valid" in error_message_str:
+            if _PERMISSION_RE.search(error_text):
                  return f"Google API Error (PermissionDeniedError likely): {str(e)}. Check API key permissions or validity."
-            if "notfound" in error_type.lower():
+            if _NOT_FOUND_RE.search(error_type):
                 return f"Google API Error (NotFoundError likely): {str(e)}. Model '{model_path_for_api}' or resource not found."
 
             # Heuristics for retryable conditions based on error message content or error type
-            is_retryable_heuristic = (
-                "quota" in error_message_str or 
-                "resource exhausted" in error_message_str or 
-                "rate limit" in error_message_str or 
-                "service unavailable" in error_message_str or
-                "deadline exceeded" in error_message_str or
-                "internal server error" in error_message_str or
-                isinstance(e, genai_errors.ServerError) # If ServerError is a known type
-            )
+            is_retryable_heuristic = bool(_RETRYABLE_RE.search(error_text)) or isinstance(e, genai_errors.ServerError)
 
             if is_retryable_heuristic and current_retry < max_retries:
                 print(f"Retryable API Error ({error_type}) encountered: {e}. Retry {current_retry + 1}/{max_retries}...")
-                backoff_time = (initial_backoff_seconds * (2 ** current_retry)) + (os.urandom(1)[0] / 256.0)
+                backoff_time = _retry_delay(e, initial_backoff_seconds, current_retry)
+                _log_retry(current_retry + 1, max_retries, backoff_time, e)
                 print(f"Waiting {backoff_time:.2f} seconds before retrying.")
                 time.sleep(backoff_time)
                 current_retry += 1
@@ -323,89 +851,63 @@ def get_gemini_response_with_function_calling(
             print(f"Unexpected non-API error in get_gemini_response_with_function_calling: {e} (Type: {e.__class__.__name__}). Retry {current_retry + 1}/{max_retries}...")
             if current_retry == max_retries:
                 return f"Error: An unexpected non-API error occurred after {max_retries} retries: {e}"
-            backoff_time = (initial_backoff_seconds * (2 ** current_retry)) + (os.urandom(1)[0] / 256.0)
+            backoff_time = _backoff_seconds(initial_backoff_seconds, current_retry)
             time.sleep(backoff_time)
             current_retry += 1
             
     return f"Error: All {max_retries} retries failed for get_gemini_response_with_function_calling."
 
-async def get_gemini_response_with_function_calling_async(
+async def _function_calling_once_async(
     prompt_parts: List[Union[str, Dict[str, Any]]],
-    tools: Optional[List[Dict[str, Any]]] = None,
-    model_name_override: Optional[str] = None,
-    max_retries: int = 3,
-    initial_backoff_seconds: float = 1.0,
-    temperature: Optional[float] = None
+    tools: Optional[List[Dict[str, Any]]],
+    model_name_override: Optional[str],
+    max_retries: int,
+    initial_backoff_seconds: float,
+    temperature: Optional[float],
+    max_output_tokens: Optional[int] = None
 ) -> Union[Dict[str, Any], str]:
-    """
-    Async version of get_gemini_response_with_function_calling for true parallel processing.
-    
-    This function enables concurrent LLM API calls by using asyncio.sleep for delays
-    and running the blocking API call in a thread pool.
-    """
-    # Load config directly to avoid circular imports
-    import json
-    from pathlib import Path
-    
-    config_path = Path(__file__).parent.parent / "config.json"
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-    
-    if model_name_override:
-        model_name = model_name_override
-    else:
-        model_name = config["google"]["default_model"]
+    """One model's attempt (with retries) for get_gemini_response_with_function_calling_async."""
+    model_name = model_name_override or GOOGLE_DEFAULT_MODEL
 
     # Use the module-level client variable that was created at import time
     if not client:
         return "Error: GOOGLE_API_KEY or GEMINI_API_KEY not configured or client not created."
 
-    # Model name to API path mapping - we need to add models/ prefix for API path
-    model_path_for_api = f"models/{model_name}" if not model_name.startswith("models/") else model_name
-    print(f"[INFO] Using Gemini model: {model_name} (API path: {model_path_for_api})")
+    model_path_for_api = _model_path(model_name)
+    logger.info("Using Gemini model: %s (API path: %s)", model_name, model_path_for_api)
+
+    # Tool declarations precede the contents in the request, so a fixed order keeps that prefix cacheable
+    if tools:
+        tools = sorted(tools, key=lambda tool: tool["name"])
+
+    cache_key, cached = await response_cache.alookup(
+        model_path_for_api, prompt_parts, tools, temperature,
+        options={"max_output_tokens": max_output_tokens} if max_output_tokens is not None else None
+    )
+    if cached is not None:
+        logger.info("Returning cached Gemini response for %s", model_path_for_api)
+        return cached
 
     current_retry = 0
     
     while current_retry <= max_retries:
         try:
-            print(f"[DEBUG] Starting API call attempt {current_retry + 1}/{max_retries + 1}")
+            logger.debug("Starting API call attempt %s/%s", current_retry + 1, max_retries + 1)
             
             # Prepare the config and tools (same as sync version)
-            config_obj = None
-            if tools:
-                print(f"[DEBUG] Converting {len(tools)} tool(s) to proper format...")
-                converted_tools = []
-                for i, tool_dict in enumerate(tools):
-                    print(f"[DEBUG] Converting tool {i + 1}: {tool_dict.get('name', 'unknown')}")
-                    func_decl = genai_types.FunctionDeclaration(
-                        name=tool_dict["name"],
-                        description=tool_dict["description"],
-                        parameters=tool_dict["parameters"]
-                    )
-                    tool = genai_types.Tool(function_declarations=[func_decl])
-                    converted_tools.append(tool)
-                    print(f"[DEBUG] Tool {i + 1} converted successfully")
-                
-                config_kwargs = {"tools": converted_tools}
-                if temperature is not None:
-                    config_kwargs["temperature"] = temperature
-                config_obj = genai_types.GenerateContentConfig(**config_kwargs)
-            else:
-                if temperature is not None:
-                    config_obj = genai_types.GenerateContentConfig(temperature=temperature)
+            config_obj = _build_generate_config(json.dumps(tools, sort_keys=True) if tools else None, temperature, max_output_tokens)
             
-            # Run the blocking API call in a thread pool to avoid blocking the event loop
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,  # Use default thread pool
-                lambda: client.models.generate_content(
+            # Native async call; no thread pool hop and no per-call connection setup
+            api_client, limiter = _next_client(prompt_parts)
+            async with limiter:
+                response = await api_client.aio.models.generate_content(
                     model=model_path_for_api,
                     contents=prompt_parts,
                     config=config_obj
                 )
-            )
             
-            print(f"[DEBUG] API call completed successfully")
+            logger.debug("API call completed successfully")
+            _log_prompt_cache_usage(response)
             
             # Process response (same logic as sync version)
             if response.prompt_feedback and response.prompt_feedback.block_reason:
@@ -416,11 +918,14 @@ async def get_gemini_response_with_function_calling_async(
             if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
                 for part in response.candidates[0].content.parts:
                     if part.function_call:
-                        print(f"[DEBUG] Function call found! Returning arguments...")
-                        return dict(part.function_call.args)
+                        logger.debug("Function call found! Returning arguments...")
+                        function_args = dict(part.function_call.args)
+                        await response_cache.astore(cache_key, function_args)
+                        return function_args
             
             # Return text response if available
             if response.text:
+                await response_cache.astore(cache_key, response.text)
                 return response.text
             
             # Handle other cases
@@ -442,27 +947,21 @@ async def get_gemini_response_with_function_calling_async(
 
         except genai_errors.APIError as e:
             error_type = e.__class__.__name__
-            error_message_str = str(e).lower()
+            error_text = f"{error_type} {e}"
             
-            if "400" in str(e) or "bad request" in error_message_str:
+            if _BAD_REQUEST_RE.search(error_text):
                 return f"Error: Google API 400 Bad Request: {str(e)}"
 
-            if "prompt was blocked" in error_message_str or "blockedprompt" in error_type.lower():
+            if _BLOCKED_RE.search(error_text):
                 return f"Error: Google API blocked the prompt: {e}"
             
             # Check for retryable conditions
-            is_retryable_heuristic = (
-                "quota" in error_message_str or 
-                "resource exhausted" in error_message_str or 
-                "rate limit" in error_message_str or 
-                "service unavailable" in error_message_str or
-                "deadline exceeded" in error_message_str or
-                "internal server error" in error_message_str
-            )
+            is_retryable_heuristic = bool(_RETRYABLE_RE.search(error_text))
 
             if is_retryable_heuristic and current_retry < max_retries:
                 print(f"Retryable API Error ({error_type}) encountered: {e}. Retry {current_retry + 1}/{max_retries}...")
-                backoff_time = (initial_backoff_seconds * (2 ** current_retry)) + (os.urandom(1)[0] / 256.0)
+                backoff_time = _retry_delay(e, initial_backoff_seconds, current_retry)
+                _log_retry(current_retry + 1, max_retries, backoff_time, e)
                 print(f"Waiting {backoff_time:.2f} seconds before retrying.")
                 await asyncio.sleep(backoff_time)  # Use async sleep!
                 current_retry += 1
@@ -473,12 +972,106 @@ async def get_gemini_response_with_function_calling_async(
             print(f"Unexpected non-API error: {e} (Type: {e.__class__.__name__}). Retry {current_retry + 1}/{max_retries}...")
             if current_retry == max_retries:
                 return f"Error: An unexpected non-API error occurred after {max_retries} retries: {e}"
-            backoff_time = (initial_backoff_seconds * (2 ** current_retry)) + (os.urandom(1)[0] / 256.0)
+            backoff_time = _backoff_seconds(initial_backoff_seconds, current_retry)
             await asyncio.sleep(backoff_time)  # Use async sleep!
             current_retry += 1
             
     return f"Error: All {max_retries} retries failed for get_gemini_response_with_function_calling_async."
 
+async def aclose_client() -> None:
+    """Close the shared clients' async connection pools; call once on application shutdown."""
+    if client:
+        await client.aio.aclose()
+    for extra_client, _ in _extra_clients or ():
+        await extra_client.aio.aclose()
+
+# --- Model Escalation ---
+# Function calls run on the requested (fast) model first and are re-issued once on the
+# configured high model only when the answer is unusable. ESCALATION_STATS counts both.
+GOOGLE_ESCALATION_MODEL = MODEL_CONFIG.get("google", {}).get("high_model", "gemini-1.5-pro-latest")
+ESCALATION_STATS = {"calls": 0, "escalations": 0}
+
+def _should_escalate(result: Union[Dict[str, Any], str], tools: Optional[List[Dict[str, Any]]]) -> bool:
+    """True for an empty answer, a safety stop, or function args missing a tool's required fields."""
+    if isinstance(result, dict):
+        if not tools:
+            return False
+        # The args don't name their function, so accept them if they satisfy any declared tool
+        return not any(
+            all(field in result for field in tool.get("parameters", {}).get("required", []))
+            for tool in tools
+        )
+    return result == "" or (result.startswith("Error: LLM response was empty or incomplete") and "SAFETY" in result)
+
+def _record_escalation(model_name: str, result: Union[Dict[str, Any], str], tools) -> bool:
+    ESCALATION_STATS["calls"] += 1
+    if model_name == GOOGLE_ESCALATION_MODEL or not _should_escalate(result, tools):
+        return False
+    ESCALATION_STATS["escalations"] += 1
+    logger.info(
+        "Escalating function call from %s to %s (%s/%s calls escalated so far)",
+        model_name, GOOGLE_ESCALATION_MODEL, ESCALATION_STATS["escalations"], ESCALATION_STATS["calls"]
+    )
+    return True
+
+def get_gemini_response_with_function_calling(
+    prompt_parts: List[Union[str, Dict[str, Any]]], # Can take dicts for parts, SDK handles conversion
+    tools: Optional[List[Dict[str, Any]]] = None, # Tools as list of dicts, SDK handles conversion
+    model_name_override: Optional[str] = None,
+    max_retries: int = 3,
+    initial_backoff_seconds: float = 1.0,
+    temperature: Optional[float] = None,
+    escalate: bool = True,
+    max_output_tokens: Optional[int] = None
+) -> Union[Dict[str, Any], str]:
+    """
+    Gets a response from Google Gemini API, supporting multi-modal input, function calling, and retries.
+    Uses client.models.generate_content for API interaction.
+
+    Args:
+        prompt_parts: A list of content parts for the prompt (strings or dicts for file data).
+        tools: An optional list of tool definitions (as dictionaries matching SDK structure).
+        model_name_override: Optional model name to use (e.g., 'gemini-1.5-pro-latest').
+        max_retries: Maximum number of retries for retryable errors.
+        initial_backoff_seconds: Initial backoff time for retries.
+        temperature: Optional temperature parameter for controlling randomness (0.0 for deterministic).
+        escalate: Re-issue the request once against GOOGLE_ESCALATION_MODEL if the first answer
+            is empty, blocked for safety, or missing required function arguments.
+        max_output_tokens: Optional cap on generated tokens. Unset by default because function
+            call arguments grow with the input (one punch event per shift), and a truncated call is unusable.
+
+    Returns:
+        A dictionary with function call arguments if a function is called by the LLM.
+        A string with the LLM's text response if no function call is made.
+        A string prefixed with "Error:" if an unrecoverable error occurs or retries are exhausted.
+    """
+    result = _function_calling_once(prompt_parts, tools, model_name_override, max_retries, initial_backoff_seconds, temperature, max_output_tokens)
+    if escalate and client and _record_escalation(model_name_override or GOOGLE_DEFAULT_MODEL, result, tools):
+        return _function_calling_once(prompt_parts, tools, GOOGLE_ESCALATION_MODEL, max_retries, initial_backoff_seconds, temperature, max_output_tokens)
+    return result
+
+async def get_gemini_response_with_function_calling_async(
+    prompt_parts: List[Union[str, Dict[str, Any]]],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    model_name_override: Optional[str] = None,
+    max_retries: int = 3,
+    initial_backoff_seconds: float = 1.0,
+    temperature: Optional[float] = None,
+    escalate: bool = True,
+    max_output_tokens: Optional[int] = None
+) -> Union[Dict[str, Any], str]:
+    """
+    Async version of get_gemini_response_with_function_calling for true parallel processing.
+    
+    This function enables concurrent LLM API calls by using asyncio.sleep for delays
+    and awaiting client.aio, which shares the process-wide connection pool.
+    Escalates to GOOGLE_ESCALATION_MODEL the same way as the sync version.
+    """
+    result = await _function_calling_once_async(prompt_parts, tools, model_name_override, max_retries, initial_backoff_seconds, temperature, max_output_tokens)
+    if escalate and client and _record_escalation(model_name_override or GOOGLE_DEFAULT_MODEL, result, tools):
+        return await _function_calling_once_async(prompt_parts, tools, GOOGLE_ESCALATION_MODEL, max_retries, initial_backoff_seconds, temperature, max_output_tokens)
+    return result
+
 # Example of how Pydantic schemas can be converted to Gemini Tool dictionary structure:
 # This helper would typically live in llm_processing.py or a shared schema utilities module.
 #
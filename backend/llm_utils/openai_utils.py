@@ -2,59 +2,72 @@
 
 import openai
 import os
-import json
+import threading
+from typing import Optional
+
+from .config import MODEL_CONFIG
+from .rate_limit import TokenBucket
 
 # Load environment variables
 # from dotenv import load_dotenv
 # load_dotenv() # Consider loading .env file if you choose to use one
 
-# Load model configuration
-CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
-MODEL_CONFIG = {"openai": {"default_model": "gpt-3.5-turbo"}} # Default fallback
-try:
-    with open(CONFIG_PATH, 'r') as f:
-        MODEL_CONFIG = json.load(f)
-except FileNotFoundError:
-    print(f"Warning: {CONFIG_PATH} not found. Using default OpenAI model name.")
-except json.JSONDecodeError:
-    print(f"Warning: Error decoding {CONFIG_PATH}. Using default OpenAI model name.")
-
 OPENAI_DEFAULT_MODEL = MODEL_CONFIG.get("openai", {}).get("default_model", "gpt-3.5-turbo")
+# The SDK retries 429/5xx/timeouts itself with exponential backoff and honors Retry-After
+OPENAI_REQUEST_TIMEOUT_SECONDS = 30.0
+OPENAI_MAX_RETRIES = 5
+# Calls in flight are capped; they are only paced when openai.rate_limit.requests_per_minute is set
+_RATE_LIMIT_CONFIG = MODEL_CONFIG.get("openai", {}).get("rate_limit", {})
+_REQUESTS_PER_MINUTE = _RATE_LIMIT_CONFIG.get("requests_per_minute")
+_RATE_LIMITER = TokenBucket(
+    rate=_REQUESTS_PER_MINUTE / 60 if _REQUESTS_PER_MINUTE else None,
+    capacity=_RATE_LIMIT_CONFIG.get("burst", 20),
+    max_concurrency=_RATE_LIMIT_CONFIG.get("max_concurrency", 20)
+)
 # OPENAI_VISION_MODEL = MODEL_CONFIG.get("openai", {}).get("vision_model", "gpt-4-vision-preview") # If you implement vision for OpenAI
 
 # openai.api_key = os.getenv("OPENAI_API_KEY") # The SDK does this by default
+# Read once at import; call reload_keys() after changing the environment (e.g. load_dotenv)
+_OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def get_openai_response(prompt: str, file_content: bytes = None, filename: str = None):
-    """Gets a response from OpenAI, potentially with file context."""
-    # Placeholder for actual implementation
-    if not openai.api_key:
-        return "Error: OPENAI_API_KEY not configured."
+# One client per process (each holds its own HTTP connection pool), created on first use
+_openai_client: Optional[openai.OpenAI] = None
+_async_openai_client: Optional[openai.AsyncOpenAI] = None
+_client_lock = threading.Lock()
 
-    if file_content:
-        # This is a simplified example. For actual file uploads with OpenAI,
-        # you might need to use the Assistants API or other methods depending on your exact needs.
-        # For now, we'll just prepend a message about the file to the prompt.
-        prompt = f"The user uploaded a file named '{filename}'.\n\nContent (first 1000 chars):\n{file_content[:1000].decode(errors='ignore')}\n\nUser prompt: {prompt}"
+def _get_client() -> openai.OpenAI:
+    global _openai_client
+    if _openai_client is None:
+        with _client_lock:
+            if _openai_client is None:
+                _openai_client = openai.OpenAI(api_key=_OPENAI_API_KEY, timeout=OPENAI_REQUEST_TIMEOUT_SECONDS, max_retries=OPENAI_MAX_RETRIES)
+    return _openai_client
 
-    try:
-        response = openai.Completion.create(
-            engine="text-davinci-003",  # Or another model like gpt-3.5-turbo with ChatCompletion
-            prompt=prompt,
-            max_tokens=150
-        )
-        return response.choices[0].text.strip()
-    except Exception as e:
-        return f"Error interacting with OpenAI: {e}"
+def _get_async_client() -> openai.AsyncOpenAI:
+    global _async_openai_client
+    if _async_openai_client is None:
+        with _client_lock:
+            if _async_openai_client is None:
+                _async_openai_client = openai.AsyncOpenAI(api_key=_OPENAI_API_KEY, timeout=OPENAI_REQUEST_TIMEOUT_SECONDS, max_retries=OPENAI_MAX_RETRIES)
+    return _async_openai_client
 
-# Example for ChatCompletion (more common now):
-def get_openai_chat_response(prompt: str, file_content: bytes = None, filename: str = None):
-    """Gets a chat response from OpenAI (e.g., gpt-3.5-turbo or gpt-4), potentially with file context."""
-    # The OpenAI SDK automatically loads the API key from the OPENAI_API_KEY environment variable.
-    # If it's not set, the SDK will raise an error.
-    # We add a check here for a more user-friendly message if running locally and it's missing.
-    if not os.getenv("OPENAI_API_KEY"):
-         return "Error: OPENAI_API_KEY not found in environment variables. Please set it in your .env file or system environment."
+def reload_keys() -> None:
+    """Re-read OPENAI_API_KEY; clients are recreated with the new key on next use."""
+    global _OPENAI_API_KEY, _openai_client, _async_openai_client
+    with _client_lock:
+        _OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+        _openai_client = None
+        _async_openai_client = None
 
+async def aclose_client() -> None:
+    """Close the shared async client's connection pool; call once on application shutdown."""
+    global _async_openai_client
+    if _async_openai_client is not None:
+        await _async_openai_client.close()
+        _async_openai_client = None
+
+def _chat_messages(prompt: str, file_content: bytes = None, filename: str = None):
+    """Build the chat messages for get_openai_chat_response and its async twin."""
     messages = []
     if file_content:
         # This is a simplified way to include file context for chat models.
@@ -67,22 +80,63 @@ def get_openai_chat_response(prompt: str, file_content: bytes = None, filename:
         })
     
     messages.append({"role": "user", "content": prompt})
+    return messages
 
-    try:
-        client = openai.OpenAI() # Initializes with API key from environment
-        response = client.chat.completions.create(
-            model=OPENAI_DEFAULT_MODEL, # Use model from config
-            messages=messages,
-            max_tokens=500 # Increased max_tokens for potentially longer responses
-        )
-        return response.choices[0].message.content.strip()
-    except openai.APIConnectionError as e:
+def _openai_error_message(e: Exception) -> str:
+    if isinstance(e, openai.APIConnectionError):
         return f"OpenAI API Connection Error: {e}"
-    except openai.RateLimitError as e:
+    if isinstance(e, openai.RateLimitError):
         return f"OpenAI API Rate Limit Exceeded: {e}"
-    except openai.AuthenticationError as e:
+    if isinstance(e, openai.AuthenticationError):
         return f"OpenAI API Authentication Error: {e}. Check your API key."
-    except openai.APIError as e:
+    if isinstance(e, openai.APIError):
         return f"OpenAI API Error: {e}"
+    return f"An unexpected error occurred with OpenAI: {e}"
+
+def get_openai_chat_response(prompt: str, file_content: bytes = None, filename: str = None):
+    """Gets a chat response from OpenAI (e.g., gpt-3.5-turbo or gpt-4), potentially with file context."""
+    # The OpenAI SDK automatically loads the API key from the OPENAI_API_KEY environment variable.
+    # If it's not set, the SDK will raise an error.
+    # We add a check here for a more user-friendly message if running locally and it's missing.
+    if not _OPENAI_API_KEY:
+         return "Error: OPENAI_API_KEY not found in environment variables. Please set it in your .env file or system environment."
+
+    messages = _chat_messages(prompt, file_content, filename)
+
+    try:
+        client = _get_client() # API key from environment
+        with _RATE_LIMITER:
+            response = client.chat.completions.create(
+                model=OPENAI_DEFAULT_MODEL, # Use model from config
+                messages=messages,
+                max_tokens=500 # Increased max_tokens for potentially longer responses
+            )
+        return response.choices[0].message.content.strip()
     except Exception as e:
-        return f"An unexpected error occurred with OpenAI: {e}" 
\ No newline at end of file
+        return _openai_error_message(e)
+
+async def aget_openai_chat_response(prompt: str, file_content: bytes = None, filename: str = None):
+    """
+    Async version of get_openai_chat_response for use inside request handlers.
+    Uses openai.AsyncOpenAI so the event loop keeps serving other requests during the call.
+    """
+    if not _OPENAI_API_KEY:
+         return "Error: OPENAI_API_KEY not found in environment variables. Please set it in your .env file or system environment."
+
+    messages = _chat_messages(prompt, file_content, filename)
+
+    try:
+        client = _get_async_client() # API key from environment
+        async with _RATE_LIMITER:
+            response = await client.chat.completions.create(
+                model=OPENAI_DEFAULT_MODEL, # Use model from config
+                messages=messages,
+                max_tokens=500
+            )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        return _openai_error_message(e)
+
+# The old text-completion helper (openai.Completion / text-davinci-003) no longer exists in the SDK;
+# the name is kept for existing imports and now goes through the chat API.
+get_openai_response = get_openai_chat_response
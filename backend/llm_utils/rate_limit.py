@@ -0,0 +1,126 @@
+"""
+Process-wide request rate limiting for LLM API calls
+
+TokenBucket hands out one token per call, refilling at `rate` tokens per
+second up to `capacity`. Tokens are reserved in arrival order (the balance
+may go negative), so a burst of callers - including retries after a 429 -
+is spread out evenly instead of all waking at once. The same bucket works
+for threads (`with bucket:`) and coroutines (`async with bucket:`). With
+rate=None calls are not paced at all; the bucket then only caps concurrency.
+
+Used as a context manager around the API call, the bucket also:
+- caps calls in flight at max_concurrency (separately for threads and for
+  each event loop), and
+- adapts to the server: a call that fails with HTTP 429 halves the refill
+  rate (down to min_rate), and each successful call wins back a small step
+  towards the configured rate.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Optional
+
+RATE_LIMITED_STATUS = 429
+# Share of the configured rate regained per successful call after a 429
+RECOVERY_STEP = 0.05
+
+
+def _is_rate_limited(exc: Optional[BaseException]) -> bool:
+    """True for SDK errors carrying HTTP 429 (google.genai uses .code, openai uses .status_code)."""
+    return exc is not None and RATE_LIMITED_STATUS in (getattr(exc, "code", None), getattr(exc, "status_code", None))
+
+
+class TokenBucket:
+    """Thread-safe token bucket usable from sync and async code."""
+
+    def __init__(self, rate: Optional[float], capacity: float = 1, max_concurrency: Optional[int] = None, min_rate: Optional[float] = None):
+        if rate is not None and (rate <= 0 or capacity < 1):
+            raise ValueError("TokenBucket needs a positive rate and a capacity of at least 1")
+        self.rate = rate
+        self.base_rate = rate
+        self.min_rate = min_rate if min_rate is not None or rate is None else rate / 8
+        self.capacity = capacity
+        self.max_concurrency = max_concurrency
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread_slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._loop_slots = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def record_result(self, exc: Optional[BaseException]) -> None:
+        """Feed a call outcome back into the refill rate (multiplicative decrease, additive increase)."""
+        if self.rate is None:
+            return
+        with self._lock:
+            if _is_rate_limited(exc):
+                self.rate = max(self.min_rate, self.rate / 2)
+            elif exc is None and self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def _async_slots(self) -> Optional[asyncio.Semaphore]:
+        if not self.max_concurrency:
+            return None
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots.get(loop)
+        if slots is None:
+            slots = self._loop_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+    def __enter__(self):
+        if self._thread_slots:
+            self._thread_slots.acquire()
+        try:
+            self.acquire()
+        except BaseException:
+            if self._thread_slots:
+                self._thread_slots.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._thread_slots:
+            self._thread_slots.release()
+        self.record_result(exc)
+        return False
+
+    async def __aenter__(self):
+        slots = self._async_slots()
+        if slots:
+            await slots.acquire()
+        try:
+            await self.acquire_async()
+        except BaseException:
+            if slots:
+                slots.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        slots = self._async_slots()
+        if slots:
+            slots.release()
+        self.record_result(exc)
+        return False
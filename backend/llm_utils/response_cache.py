@@ -0,0 +1,281 @@
+"""
+Exact-match (and optional semantic) cache for Gemini API responses
+
+The helpers in google_utils check this cache before calling the API. The key
+is SHA-256 over the model path, prompt parts (file bytes reduced to their own
+digest), tool declarations, temperature and any other generation options
+(output-token limit, stop sequences), so only byte-identical requests
+share an entry. Successful function-call arguments (dict) and text (str) are
+stored as tagged JSON in SQLite and expire after DEFAULT_TTL_SECONDS; error
+strings are never cached.
+
+The cache is off unless TIMESHEET_MAGIC_RESPONSE_CACHE=1: entries hold parsed
+timesheet data (employee names and hours), and a re-analysis of the same file
+should not return a stale answer, so it is meant for development runs that
+repeat the same request. Entries live in ~/.timesheet_cache.db (override with
+TIMESHEET_MAGIC_RESPONSE_CACHE_PATH). The async helpers use the a*-prefixed
+functions, which run the SQLite calls in a worker thread so the event loop
+never waits on the database.
+
+With SEMANTIC_CACHE=1, text-only prompts also keep their prompt embedding
+next to the response; a later prompt whose embedding has cosine similarity
+>= SEMANTIC_SIMILARITY_THRESHOLD with a stored one (same model) reuses that
+response, so paraphrased questions hit the cache too.
+"""
+
+import asyncio
+import hashlib
+import math
+from array import array
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("TIMESHEET_MAGIC_RESPONSE_CACHE", "0") == "1"
+CACHE_PATH = os.getenv(
+    "TIMESHEET_MAGIC_RESPONSE_CACHE_PATH", str(Path.home() / ".timesheet_cache.db")
+)
+DEFAULT_TTL_SECONDS = 1800
+
+# Sampling above this temperature is random enough that a cached answer would hide
+# the variation the caller asked for. Parsing runs at 0.1, which is effectively deterministic.
+MAX_CACHEABLE_TEMPERATURE = 0.2
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_SIMILARITY_THRESHOLD = 0.92
+
+CachedResponse = Union[Dict[str, Any], str]
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize prompt parts for hashing; file bytes are reduced to their digest."""
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes_sha256__": hashlib.sha256(value).hexdigest()}
+    if hasattr(value, "model_dump"):  # google.genai types are pydantic models
+        return value.model_dump(mode="json", exclude_none=True)
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+
+def normalize(vector: List[float]) -> array:
+    """L2-normalize an embedding so cosine similarity is a plain dot product."""
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return array("f", (v / norm for v in vector))
+
+
+def make_cache_key(
+    model_path: str,
+    contents: List[Any],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    temperature: Optional[float] = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Optional[str]:
+    """
+    Build the cache key for one Gemini request.
+
+    Returns None when the request should not be cached: caching is disabled,
+    the temperature is too high, or the contents cannot be serialized.
+    """
+    if not CACHE_ENABLED:
+        return None
+    if temperature is not None and temperature > MAX_CACHEABLE_TEMPERATURE:
+        return None
+
+    try:
+        digest = hashlib.sha256(model_path.encode("utf-8"))
+        # options only join the key when set, so requests without them keep their existing keys
+        for part in (contents, tools, temperature) + ((options,) if options else ()):
+            digest.update(b"\0")
+            digest.update(json.dumps(part, sort_keys=True, default=_json_default).encode("utf-8"))
+    except (TypeError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed key/value store for LLM responses with per-entry expiry."""
+
+    def __init__(self, path: str = CACHE_PATH, default_ttl: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model_path TEXT NOT NULL, vector BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for key, or None if missing or expired."""
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] < time.time():
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+            return json.loads(row[0])["value"]
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            logger.warning("Response cache read failed, calling the API instead: %s", e)
+            return None
+
+    def set(self, key: str, value: CachedResponse, ttl: Optional[float] = None) -> None:
+        """Store a dict (function call arguments) or str (text) response."""
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        try:
+            payload = json.dumps({"type": type(value).__name__, "value": value})
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    def set_embedding(self, key: str, model_path: str, vector: array, ttl: Optional[float] = None) -> None:
+        """Store the normalized prompt embedding for the response cached under key."""
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model_path, vector, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, model_path, vector.tobytes(), expires_at)
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Response cache embedding write failed: %s", e)
+
+    def nearest(self, model_path: str, vector: array) -> Optional[Tuple[str, float]]:
+        """Return (key, cosine similarity) of the closest live embedding for model_path."""
+        best: Optional[Tuple[str, float]] = None
+        try:
+            with self._lock:
+                conn = self._connection()
+                now = time.time()
+                conn.execute("DELETE FROM embeddings WHERE expires_at < ?", (now,))
+                conn.commit()
+                rows = conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE model_path = ?", (model_path,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Response cache embedding read failed: %s", e)
+            return None
+
+        for key, blob in rows:
+            stored = array("f")
+            stored.frombytes(blob)
+            if len(stored) != len(vector):  # embedding model changed
+                continue
+            score = sum(a * b for a, b in zip(stored, vector))
+            if best is None or score > best[1]:
+                best = (key, score)
+        return best
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> LLMCache:
+    """Return the process-wide response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+
+def lookup(
+    model_path: str,
+    contents: List[Any],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    temperature: Optional[float] = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[str], Optional[CachedResponse]]:
+    """
+    Look a request up in the cache.
+
+    Returns:
+        (key, cached response). key is None for uncacheable requests; the
+        response is None on a miss.
+    """
+    key = make_cache_key(model_path, contents, tools, temperature, options)
+    if key is None:
+        return None, None
+    return key, get_response_cache().get(key)
+
+
+def store(key: Optional[str], response: CachedResponse) -> None:
+    """Cache a successful response under a key from lookup(); no-op for None keys."""
+    if key is not None:
+        get_response_cache().set(key, response)
+
+
+def semantic_lookup(model_path: str, vector: array) -> Optional[CachedResponse]:
+    """Return the cached response of the most similar earlier prompt, if close enough."""
+    match = get_response_cache().nearest(model_path, vector)
+    if match is None or match[1] < SEMANTIC_SIMILARITY_THRESHOLD:
+        return None
+    return get_response_cache().get(match[0])
+
+
+def store_embedding(key: Optional[str], model_path: str, vector: Optional[array]) -> None:
+    """Index a stored response by its prompt embedding; no-op without a key or vector."""
+    if key is not None and vector is not None:
+        get_response_cache().set_embedding(key, model_path, vector)
+
+
+async def alookup(
+    model_path: str,
+    contents: List[Any],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    temperature: Optional[float] = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[str], Optional[CachedResponse]]:
+    """Async version of lookup(); hashing and the SQLite read run in a worker thread."""
+    if not CACHE_ENABLED:
+        return None, None
+    return await asyncio.to_thread(lookup, model_path, contents, tools, temperature, options)
+
+
+async def astore(key: Optional[str], response: CachedResponse) -> None:
+    """Async version of store()."""
+    if key is not None:
+        await asyncio.to_thread(store, key, response)
+
+
+async def asemantic_lookup(model_path: str, vector: array) -> Optional[CachedResponse]:
+    """Async version of semantic_lookup()."""
+    return await asyncio.to_thread(semantic_lookup, model_path, vector)
+
+
+async def astore_embedding(key: Optional[str], model_path: str, vector: Optional[array]) -> None:
+    """Async version of store_embedding()."""
+    if key is not None and vector is not None:
+        await asyncio.to_thread(store_embedding, key, model_path, vector)
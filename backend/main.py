@@ -1,8 +1,10 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel # For potential request body validation, though Form is used here
 import os
 import sys
+import json
 from typing import Optional # For UploadFile
 
 # Add project root to sys.path to allow importing llm_utils
@@ -10,7 +12,10 @@ from typing import Optional # For UploadFile
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
 
-from llm_utils import get_openai_chat_response, get_google_gemini_response
+from llm_utils import aget_openai_chat_response, aget_google_gemini_response, aget_google_gemini_response_stream
+from llm_utils.google_utils import ERROR_PREFIXES as LLM_ERROR_PREFIXES, INLINE_MAX_BYTES, FILE_TEXT_MAX_BYTES, aupload_file, aclose_client
+from llm_utils.openai_utils import aclose_client as aclose_openai_client
+from llm_utils import google_utils, openai_utils
 from dotenv import load_dotenv
 
 # Load .env.local file from the backend directory for local development
@@ -25,6 +30,9 @@ if os.path.exists(DOTENV_LOCAL_PATH):
 else:
     print(f"Loading environment from: {DOTENV_ROOT_PATH}")
     load_dotenv(DOTENV_ROOT_PATH)
+# llm_utils read the API keys when imported above; pick up any that came from the .env file
+google_utils.reload_keys()
+openai_utils.reload_keys()
 
 app = FastAPI()
 
@@ -43,23 +51,37 @@ app.add_middleware(
 # text: str
 # provider: str
 
+@app.on_event("shutdown")
+async def shutdown_llm_clients():
+    """Release the shared Gemini and OpenAI clients' pooled connections."""
+    await aclose_client()
+    await aclose_openai_client()
+
+async def _sse_events(first_chunk, chunks):
+    """Format streamed text chunks as server-sent events, ending with a 'done' event."""
+    yield f"event: message\ndata: {json.dumps(first_chunk)}\n\n"
+    async for chunk in chunks:
+        event = "error" if chunk.startswith(LLM_ERROR_PREFIXES) else "message"
+        yield f"event: {event}\ndata: {json.dumps(chunk)}\n\n"
+    yield "event: done\ndata: {}\n\n"
+
 @app.post("/api/generate")
 async def generate_text(
     provider: str = Form(...),
     text: str = Form(...),
-    file: Optional[UploadFile] = File(None) # Optional file upload
+    file: Optional[UploadFile] = File(None), # Optional file upload
+    stream: bool = Form(False) # Google only: stream the answer as server-sent events
 ):
     print(f"Backend received: Provider='{provider}', Text='{text[:50]}...', File='{file.filename if file else None}'")
 
-    file_content: Optional[bytes] = None
+    file_content = None # bytes, or a Gemini File handle for large images (read below, after the key checks)
     filename: Optional[str] = None
     mime_type: Optional[str] = None
 
     if file:
-        file_content = await file.read()
         filename = file.filename
         mime_type = file.content_type
-        print(f"File details: Name='{filename}', Type='{mime_type}', Size='{len(file_content)} bytes'")
+        print(f"File details: Name='{filename}', Type='{mime_type}', Size='{file.size} bytes'")
 
     # API key checks (redundant if utils handle it, but good for early exit)
     if provider == "openai" and not os.getenv("OPENAI_API_KEY"):
@@ -71,10 +93,29 @@ async def generate_text(
 
     response_text = ""
     try:
+        if file:
+            is_image = bool(mime_type) and 'image' in mime_type.lower()
+            if provider == "google" and is_image and (file.size or 0) > INLINE_MAX_BYTES:
+                # Hand the spooled upload to the Files API as-is instead of buffering and inlining it
+                file_content = await aupload_file(file.file, mime_type)
+            elif provider == "google" and not is_image:
+                # Gemini only sees the head of a text upload, so don't buffer the rest
+                file_content = await file.read(FILE_TEXT_MAX_BYTES)
+            else:
+                file_content = await file.read()
+
         if provider == "openai":
-            response_text = get_openai_chat_response(prompt=text, file_content=file_content, filename=filename)
+            response_text = await aget_openai_chat_response(prompt=text, file_content=file_content, filename=filename)
+        elif provider == "google" and stream:
+            chunks = aget_google_gemini_response_stream(prompt=text, file_content=file_content, filename=filename, mime_type=mime_type)
+            # Pull the first chunk before answering so setup failures still become a 500
+            first_chunk = await chunks.__anext__()
+            if first_chunk.startswith(LLM_ERROR_PREFIXES):
+                print(f"LLM Util Error: {first_chunk}")
+                raise HTTPException(status_code=500, detail=first_chunk)
+            return StreamingResponse(_sse_events(first_chunk, chunks), media_type="text/event-stream")
         elif provider == "google":
-            response_text = get_google_gemini_response(prompt=text, file_content=file_content, filename=filename, mime_type=mime_type)
+            response_text = await aget_google_gemini_response(prompt=text, file_content=file_content, filename=filename, mime_type=mime_type)
         else:
             raise HTTPException(status_code=400, detail="Invalid AI provider specified. Choose 'openai' or 'google'.")
         
@@ -14,6 +14,9 @@ CREATE TABLE IF NOT EXISTS leads (
 );
 
 -- Table for storing analysis metadata (task 5.2.2)
+-- request_id must stay UNIQUE: the backend upserts on it so retried writes are idempotent.
+-- Existing deployments without the constraint need:
+--   ALTER TABLE analysis_metadata ADD CONSTRAINT analysis_metadata_request_id_key UNIQUE (request_id);
 CREATE TABLE IF NOT EXISTS analysis_metadata (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     request_id TEXT NOT NULL UNIQUE,
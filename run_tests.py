@@ -8,6 +8,8 @@ import os
 import sys
 import subprocess
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def get_python_executable():
@@ -32,24 +34,31 @@ def get_python_executable():
     print("   Consider running: source venv/bin/activate")
     return sys.executable
 
-def run_command(cmd, cwd=None, env=None):
-    """Run a command and return success status"""
+# Lines of output kept per command to repeat when it fails
+FAILURE_TAIL_LINES = 50
+
+def run_command(cmd, cwd=None, env=None, label=None):
+    """Run a command, streaming its output as it arrives, and return success status"""
     print(f"🚀 Running: {' '.join(cmd)}")
     if cwd:
         print(f"   Working directory: {cwd}")
-    try:
-        result = subprocess.run(cmd, cwd=cwd, env=env, check=True, capture_output=True, text=True)
+    # Commands may run side by side (integration tests), so label their lines
+    prefix = f"[{label}] " if label else ""
+    tail = deque(maxlen=FAILURE_TAIL_LINES)
+    with subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          text=True, bufsize=1) as proc:
+        for line in proc.stdout:
+            print(f"{prefix}{line}", end="", flush=True)
+            tail.append(line)
+        returncode = proc.wait()
+    if returncode == 0:
         print(f"✅ Success: {' '.join(cmd)}")
-        if result.stdout:
-            print(result.stdout)
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed: {' '.join(cmd)}")
-        if e.stdout:
-            print("STDOUT:", e.stdout)
-        if e.stderr:
-            print("STDERR:", e.stderr)
-        return False
+    print(f"❌ Failed (exit code {returncode}): {' '.join(cmd)}")
+    if tail:
+        print(f"   Last {len(tail)} lines of output:")
+        print("".join(f"{prefix}{line}" for line in tail), end="")
+    return False
 
 def setup_python_env():
     """Set up Python environment variables for imports"""
@@ -68,6 +77,14 @@ def setup_python_env():
     
     return env
 
+def parallel_pytest_args(python_exe):
+    """pytest-xdist args to spread tests over all cores, or [] if xdist isn't installed"""
+    has_xdist = subprocess.run([python_exe, "-c", "import xdist"], capture_output=True).returncode == 0
+    if not has_xdist:
+        print("⚠️  pytest-xdist not installed, running unit tests serially")
+        return []
+    return ["-n", "auto"]
+
 def run_unit_tests():
     """Run backend unit tests with pytest"""
     print("\n🧪 Running Unit Tests (pytest)")
@@ -77,11 +94,11 @@ def run_unit_tests():
     backend_path = Path(__file__).parent / "backend"
     env = setup_python_env()
     
-    cmd = [python_exe, "-m", "pytest", "app/tests/", "-v", "--tb=short"]
+    cmd = [python_exe, "-m", "pytest", "app/tests/", "-v", "--tb=short"] + parallel_pytest_args(python_exe)
     return run_command(cmd, cwd=backend_path, env=env)
 
-def run_integration_tests():
-    """Run integration tests from tests/ directory"""
+def run_integration_tests(max_workers=None):
+    """Run integration tests from tests/ directory, several scripts at a time"""
     print("\n🔗 Running Integration Tests")
     print("=" * 50)
     
@@ -97,18 +114,21 @@ def run_integration_tests():
         "test_immediate_flow.py"
     ]
     
-    success_count = 0
     total_count = len(test_files)
     
-    for test_file in test_files:
+    def run_test_file(test_file):
         test_path = script_dir / "tests" / test_file
-        if test_path.exists():
-            print(f"\n📋 Running {test_file}...")
-            cmd = [python_exe, str(test_path)]
-            if run_command(cmd, cwd=script_dir, env=env):
-                success_count += 1
-        else:
+        if not test_path.exists():
             print(f"⚠️  Test file not found: {test_file}")
+            return False
+        print(f"\n📋 Running {test_file}...")
+        cmd = [python_exe, str(test_path)]
+        return run_command(cmd, cwd=script_dir, env=env, label=test_file)
+    
+    # Each script is its own process that mostly waits on the LLM API, so threads are enough to overlap them
+    max_workers = max_workers or min(total_count, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        success_count = sum(pool.map(run_test_file, test_files))
     
     print(f"\n📊 Integration Tests Complete: {success_count}/{total_count} passed")
     return success_count == total_count
@@ -153,6 +173,12 @@ def main():
         action="store_true",
         help="Verbose output"
     )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help="Integration test scripts to run at once (default: one per CPU, 1 = serial)"
+    )
     
     args = parser.parse_args()
     
@@ -166,7 +192,7 @@ def main():
             success = False
     
     if args.type in ["integration", "all"]:
-        if not run_integration_tests():
+        if not run_integration_tests(max_workers=args.jobs):
             success = False
     
     if args.type == "quick":
@@ -7,6 +7,7 @@ Tests the LLM with timeout to prevent hanging.
 import asyncio
 import os
 import sys
+import time
 from pathlib import Path
 import json
 from datetime import datetime
@@ -44,7 +45,7 @@ async def test_with_timeout():
     
     try:
         print(f"\n🤖 Starting LLM processing with timeout protection...")
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         # Wrap the LLM call with asyncio timeout
         result = await asyncio.wait_for(
@@ -57,8 +58,7 @@ async def test_with_timeout():
             timeout=timeout_seconds
         )
         
-        end_time = datetime.now()
-        processing_time = (end_time - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
         
         print(f"✅ SUCCESS! Processing completed in {processing_time:.2f} seconds")
         print(f"📊 Results:")